@@ -0,0 +1,83 @@
+"""Mengukur perilaku lapisan database (deadline, circuit breaker, hedging, fallback cache)
+terhadap FakeSupabaseServer dengan berbagai fault.
+
+    python -m benchmarks.bench_db_faults [--requests 200] [--hedge]
+"""
+import argparse
+import asyncio
+import logging
+import statistics
+import time
+
+from benchmarks.fake_supabase import FakeSupabaseServer
+from utils import database, resilience
+
+SCENARIOS = [
+    # nama, kwargs fault
+    ("healthy", {}),
+    ("slow_tail", {"latency": 0.005, "jitter": 0.3}),
+    ("errors_5xx", {"error_rate": 0.5}),
+    ("conn_resets", {"reset_rate": 0.5}),
+    ("hung_backend", {"latency": 30.0}),
+]
+TRIGGERS = [f"trigger {i}" for i in range(50)]
+
+
+def _percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+async def _run_scenario(server: FakeSupabaseServer, requests: int) -> dict:
+    latencies, served, empty = [], 0, 0
+    for i in range(requests):
+        started = time.perf_counter()
+        result = await database.get_response_from_db(TRIGGERS[i % len(TRIGGERS)])
+        latencies.append(time.perf_counter() - started)
+        if result:
+            served += 1
+        else:
+            empty += 1
+    return {
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": _percentile(latencies, 0.99) * 1000,
+        "max_ms": max(latencies) * 1000,
+        "served": served,
+        "empty": empty,
+        "breaker": resilience.breaker.state,
+        "backend_requests": server.stats["requests"],
+    }
+
+
+async def main(requests: int, hedge: bool):
+    resilience.DB_HEDGE_READS = hedge
+    print(f"{'scenario':<14}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}{'served':>8}{'empty':>7}{'backend':>9}  breaker")
+    with FakeSupabaseServer() as server:
+        server.seed_rows("learned_triggers", [
+            {"trigger_text": text, "response_type": "text", "response_content": f"reply {text}", "creator_id": 1}
+            for text in TRIGGERS
+        ])
+        database.set_client(server.make_client(timeout=resilience.DB_TIMEOUT_SECONDS))
+        # Pemanasan: isi cache "last known good" dengan backend yang sehat.
+        for text in TRIGGERS:
+            await database.get_response_from_db(text)
+
+        for name, faults in SCENARIOS:
+            server.latency = faults.get("latency", 0.0)
+            server.jitter = faults.get("jitter", 0.0)
+            server.error_rate = faults.get("error_rate", 0.0)
+            server.reset_rate = faults.get("reset_rate", 0.0)
+            server.stats["requests"] = 0
+            resilience.breaker.record_success()
+            row = await _run_scenario(server, requests)
+            print(f"{name:<14}{row['p50_ms']:>10.2f}{row['p99_ms']:>10.2f}{row['max_ms']:>10.2f}"
+                  f"{row['served']:>8}{row['empty']:>7}{row['backend_requests']:>9}  {row['breaker']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--hedge", action="store_true", help="aktifkan hedged reads (DB_HEDGE_READS)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.CRITICAL, force=True)
+    asyncio.run(main(args.requests, args.hedge))
@@ -0,0 +1,301 @@
+"""Benchmark end-to-end: update sintetis -> Dispatcher + handlers/common.router asli -> Bot API palsu.
+
+Backend-nya FakeSupabaseProcess (PostgREST palsu di proses anak) dan FakeTelegramSession,
+jadi yang diukur adalah jalur handler, FSM, lapisan database dan serialisasi aiogram.
+Setiap update di-encode ke JSON lalu di-decode dengan json_loads milik sesi (seperti
+respons getUpdates saat polling) sebelum masuk ke Dispatcher.feed_raw_update().
+
+Skenario:
+  chatter          95% obrolan biasa (bukan trigger), 5% trigger populer
+  hot_triggers     100% trigger populer (teks dengan placeholder, foto, GIF, stiker)
+  admin_pagination /deletetrigger lalu navigasi halaman (_send_delete_trigger_page)
+  learn_flow       alur LearnStates: /learn -> trigger -> pilih tipe -> isi respons
+  inline_search    inline query prefix trigger (debounce dimatikan lewat INLINE_DEBOUNCE_SECONDS=0)
+
+Hasil (throughput, persentil latensi, alokasi per update) disimpan sebagai JSON:
+
+    python -m benchmarks.bench_e2e --updates 2000 --output bench_results/base.json
+    python -m benchmarks.bench_e2e --compare bench_results/base.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+from aiogram import Bot
+
+from benchmarks.fake_supabase import FakeSupabaseProcess
+from benchmarks.fake_telegram import (
+    FakeTelegramSession, FAKE_BOT_TOKEN, make_message_update, make_callback_update,
+    make_inline_query_update,
+)
+
+SEED_TRIGGERS = 1000
+HOT_TRIGGERS = 20
+ADMIN_IDS = list(range(9000, 9020))
+CHAT_IDS = [-1000000000000 - i for i in range(50)]
+USER_IDS = list(range(100, 600))
+CHATTER_WORDS = ("halo", "pagi", "siang", "makan", "kerja", "besok", "oke", "wkwk", "mantap", "gas", "iya", "nggak")
+RESPONSE_TYPES = ("text", "photo", "animation", "sticker")
+
+
+def trigger_text(i: int) -> str:
+    return f"trigger {i}"
+
+
+def seed_backend(server):
+    rows = []
+    for i in range(SEED_TRIGGERS):
+        response_type = RESPONSE_TYPES[i % len(RESPONSE_TYPES)]
+        content = ("Halo {mention}! Sekarang {datetime} di {chat_title}, kata {bot_username}"
+                   if response_type == "text" else f"FILE_ID_{response_type}_{i}")
+        rows.append({"trigger_text": trigger_text(i), "response_type": response_type,
+                     "response_content": content, "creator_id": ADMIN_IDS[0]})
+    server.seed_rows("learned_triggers", rows)
+    server.seed_rows("bot_admins", [{"user_id": user_id, "added_by": ADMIN_IDS[0]} for user_id in ADMIN_IDS])
+
+
+# --- scenarios: masing-masing mengembalikan list dict update ---
+def scenario_chatter(count: int, rng: random.Random) -> list:
+    updates = []
+    for i in range(count):
+        if rng.random() < 0.05:
+            text = trigger_text(min(int(rng.paretovariate(1.2)) - 1, HOT_TRIGGERS - 1))
+        else:
+            text = " ".join(rng.choice(CHATTER_WORDS) for _ in range(rng.randint(1, 8)))
+        updates.append(make_message_update(i + 1, rng.choice(CHAT_IDS), rng.choice(USER_IDS), text))
+    return updates
+
+
+def scenario_hot_triggers(count: int, rng: random.Random) -> list:
+    return [make_message_update(i + 1, rng.choice(CHAT_IDS), rng.choice(USER_IDS),
+                                trigger_text(rng.randrange(HOT_TRIGGERS)))
+            for i in range(count)]
+
+
+def scenario_admin_pagination(count: int, rng: random.Random) -> list:
+    pages = SEED_TRIGGERS // 7
+    updates = []
+    for i in range(count):
+        admin_id = ADMIN_IDS[i % len(ADMIN_IDS)]
+        if i % 10 == 0:
+            updates.append(make_message_update(i + 1, admin_id, admin_id, "/deletetrigger", chat_type="private"))
+        else:
+            updates.append(make_callback_update(i + 1, admin_id, admin_id, f"del_page:{rng.randrange(pages)}"))
+    return updates
+
+
+def scenario_learn_flow(count: int, rng: random.Random) -> list:
+    updates = []
+    for flow in range(count // 4):
+        admin_id = ADMIN_IDS[flow % len(ADMIN_IDS)]
+        base = flow * 4
+        phrase = f"learned phrase {flow} {rng.random():.6f}"
+        updates.append(make_message_update(base + 1, admin_id, admin_id, "/learn", chat_type="private"))
+        updates.append(make_message_update(base + 2, admin_id, admin_id, phrase, chat_type="private"))
+        updates.append(make_callback_update(base + 3, admin_id, admin_id, "learn_type:text"))
+        updates.append(make_message_update(base + 4, admin_id, admin_id, f"respons untuk {phrase}", chat_type="private"))
+    return updates
+
+
+def scenario_inline_search(count: int, rng: random.Random) -> list:
+    updates = []
+    for i in range(count):
+        text = trigger_text(rng.randrange(SEED_TRIGGERS))
+        query = text[:rng.randint(0, len(text))]
+        updates.append(make_inline_query_update(i + 1, rng.choice(USER_IDS), query))
+    return updates
+
+
+SCENARIOS = {
+    "chatter": scenario_chatter,
+    "hot_triggers": scenario_hot_triggers,
+    "admin_pagination": scenario_admin_pagination,
+    "learn_flow": scenario_learn_flow,
+    "inline_search": scenario_inline_search,
+}
+
+
+def _percentile(ordered: list, pct: float) -> float:
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+async def _feed_all(dp, bot: Bot, raw_updates: list, concurrency: int) -> list:
+    latencies = []
+    loads = bot.session.json_loads
+
+    async def feed(raw: str):
+        started = time.perf_counter()
+        await dp.feed_raw_update(bot, loads(raw))
+        latencies.append(time.perf_counter() - started)
+
+    if concurrency <= 1:
+        for raw in raw_updates:
+            await feed(raw)
+    else:
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def bounded(raw: str):
+            async with semaphore:
+                await feed(raw)
+        await asyncio.gather(*(bounded(raw) for raw in raw_updates))
+    return latencies
+
+
+async def run_scenario(name: str, updates: list, concurrency: int, measure_alloc: bool, setup) -> dict:
+    # Setiap skenario dijalankan pada bot (sesi palsu) baru dan FSM storage kosong.
+    dp, bot = await setup()
+    raw_updates = [bot.session.json_dumps(update) for update in updates]
+    # Pemanasan kecil supaya cache pydantic/aiogram tidak ikut terhitung.
+    await _feed_all(dp, bot, raw_updates[:20], 1)
+
+    started = time.perf_counter()
+    cpu_started = time.thread_time()  # CPU thread event loop saja (tanpa thread executor klien DB)
+    latencies = await _feed_all(dp, bot, raw_updates, concurrency)
+    cpu_seconds = time.thread_time() - cpu_started
+    elapsed = time.perf_counter() - started
+    ordered = sorted(latencies)
+    result = {
+        "updates": len(raw_updates),
+        "concurrency": concurrency,
+        "seconds": elapsed,
+        "updates_per_sec": len(raw_updates) / elapsed,
+        "updates_per_cpu_sec": len(raw_updates) / cpu_seconds if cpu_seconds else 0.0,
+        "latency_ms": {
+            "mean": statistics.fmean(ordered) * 1000,
+            "p50": _percentile(ordered, 0.50) * 1000,
+            "p90": _percentile(ordered, 0.90) * 1000,
+            "p99": _percentile(ordered, 0.99) * 1000,
+            "max": ordered[-1] * 1000,
+        },
+        "bot_api_calls": len(bot.session.calls),
+    }
+
+    if measure_alloc:
+        dp, bot = await setup()
+        sample = raw_updates[:min(len(raw_updates), 500)]
+        await _feed_all(dp, bot, sample[:20], 1)
+        loads = bot.session.json_loads
+        peaks = []
+        tracemalloc.start()
+        blocks_before = sys.getallocatedblocks()
+        for raw in sample:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+            await dp.feed_raw_update(bot, loads(raw))
+            peaks.append(tracemalloc.get_traced_memory()[1] - base)
+        tracemalloc.stop()
+        result["alloc"] = {
+            "peak_kib_per_update": statistics.fmean(peaks) / 1024 if peaks else 0.0,
+            "net_blocks_per_update": (sys.getallocatedblocks() - blocks_before) / len(sample),
+        }
+    return result
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))).stdout.strip()
+    except OSError:
+        return "unknown"
+
+
+async def run_suite(scenarios: list, updates: int, concurrency: int, db_latency: float, api_latency: float,
+                    measure_alloc: bool = True, seed: int = 7, session_kwargs: dict = None) -> dict:
+    from bot import create_dispatcher
+    from utils import database, startup
+
+    # Server di proses anak: tracemalloc dan getallocatedblocks hanya melihat proses bot.
+    server = FakeSupabaseProcess(latency=db_latency).start()
+    try:
+        seed_backend(server)
+        database.set_client(server.make_client())
+
+        # Router hanya bisa di-include sekali, jadi dispatcher dipakai ulang dan state FSM-nya dikosongkan.
+        dp = create_dispatcher()
+
+        async def setup():
+            session = FakeTelegramSession(latency=api_latency, **(session_kwargs or {}))
+            bot = Bot(token=FAKE_BOT_TOKEN, session=session)
+            await startup.warm_up(bot)
+            dp.storage.storage.clear()
+            return dp, bot
+
+        results = {}
+        for name in scenarios:
+            rng = random.Random(seed)
+            results[name] = await run_scenario(name, SCENARIOS[name](updates, rng), concurrency, measure_alloc, setup)
+    finally:
+        server.stop()
+    return results
+
+
+def print_results(results: dict, baseline: dict = None):
+    header = f"{'scenario':<18}{'upd/s':>10}{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}{'peak KiB':>10}{'blocks':>8}"
+    if baseline:
+        header += f"{'upd/s vs base':>15}{'p99 vs base':>13}"
+    print(header)
+    for name, row in results.items():
+        alloc = row.get("alloc", {})
+        line = (f"{name:<18}{row['updates_per_sec']:>10.0f}{row['latency_ms']['p50']:>9.2f}"
+                f"{row['latency_ms']['p90']:>9.2f}{row['latency_ms']['p99']:>9.2f}"
+                f"{alloc.get('peak_kib_per_update', 0):>10.1f}{alloc.get('net_blocks_per_update', 0):>8.1f}")
+        base = (baseline or {}).get(name)
+        if base:
+            line += (f"{(row['updates_per_sec'] / base['updates_per_sec'] - 1) * 100:>+14.1f}%"
+                     f"{(row['latency_ms']['p99'] / base['latency_ms']['p99'] - 1) * 100:>+12.1f}%")
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scenarios", nargs="+", choices=sorted(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--updates", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--db-latency", type=float, default=0.0)
+    parser.add_argument("--api-latency", type=float, default=0.0)
+    parser.add_argument("--no-alloc", action="store_true", help="lewati pengukuran alokasi (tracemalloc)")
+    parser.add_argument("--output", help="simpan hasil ke file JSON ini")
+    parser.add_argument("--compare", help="file JSON hasil sebelumnya sebagai pembanding")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.CRITICAL, force=True)
+    # Debounce inline hanya menambah sleep; yang diukur di sini biaya pencarian + serialisasi.
+    os.environ.setdefault("INLINE_DEBOUNCE_SECONDS", "0")
+    results = asyncio.run(run_suite(args.scenarios, args.updates, args.concurrency, args.db_latency,
+                                    args.api_latency, measure_alloc=not args.no_alloc))
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)["scenarios"]
+    print_results(results, baseline)
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        document = {
+            "meta": {
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+                "git_revision": _git_revision(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "args": vars(args),
+            },
+            "scenarios": results,
+        }
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(document, f, indent=2)
+        print(f"Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
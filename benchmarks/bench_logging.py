@@ -0,0 +1,91 @@
+"""Mengukur overhead logging per pesan yang ditanggung event loop.
+
+Tiga konfigurasi, semuanya menulis 2 baris INFO yang AKTIF per pesan (baris yang benar-benar
+keluar, bukan DEBUG yang dimatikan):
+  legacy  - logging.basicConfig + baris INFO f-string (perilaku lama: I/O di event loop)
+  queue   - baris INFO yang sama lewat setup_logging() (I/O pindah ke thread listener)
+  lazy    - setup_logging() + baris INFO gaya %-args (pesan dibentuk oleh logging, bukan f-string)
+
+Yang diukur adalah waktu di thread pemanggil (event loop); sisa kerja listener tidak ikut.
+
+Output log ditulis ke file sementara supaya I/O-nya nyata tapi tidak mengotori terminal.
+
+    python -m benchmarks.bench_logging [--messages 20000]
+"""
+import argparse
+import logging
+import os
+import tempfile
+import time
+
+from utils import logging_setup
+
+TRIGGER_TEXT = "selamat pagi semuanya, apa kabar hari ini? " * 2
+
+
+def _legacy_lines(trigger_text: str, data: list):
+    trigger_text_lower = trigger_text.lower()
+    logging.info(f"[DB_OP] Attempting to fetch response for trigger: {trigger_text_lower}")
+    logging.info(f"[DB_OP_RESULT] Fetch for '{trigger_text_lower}': data_count={len(data) if data else 0}")
+
+
+def _lazy_lines(trigger_text: str, data: list):
+    trigger_text_lower = trigger_text.lower()
+    logging.info("[DB_OP] Attempting to fetch response for trigger: %s", trigger_text_lower)
+    logging.info("[DB_OP_RESULT] Fetch for '%s': data_count=%d", trigger_text_lower, len(data) if data else 0)
+
+
+def _time_per_message(emit, messages: int) -> float:
+    data = []
+    started = time.perf_counter()
+    for i in range(messages):
+        emit(TRIGGER_TEXT, data)
+    return (time.perf_counter() - started) / messages * 1e6
+
+
+class _SlowStream:
+    """Stream yang setiap write-nya tertahan `latency` detik, seperti stderr yang pipanya penuh."""
+
+    def __init__(self, stream, latency: float):
+        self.stream = stream
+        self.latency = latency
+
+    def write(self, text: str):
+        time.sleep(self.latency)
+        return self.stream.write(text)
+
+    def flush(self):
+        self.stream.flush()
+
+
+def run(messages: int, sink_latency: float = 0.0) -> dict:
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        with open(os.path.join(tmp, "legacy.log"), "w") as raw:
+            stream = _SlowStream(raw, sink_latency) if sink_latency else raw
+            logging.basicConfig(level=logging.INFO, format=logging_setup.LOG_FORMAT, stream=stream, force=True)
+            results["legacy"] = _time_per_message(_legacy_lines, messages)
+            logging.getLogger().handlers.clear()
+
+        for name, emit in (("queue", _legacy_lines), ("lazy", _lazy_lines)):
+            with open(os.path.join(tmp, f"{name}.log"), "w") as raw:
+                stream = _SlowStream(raw, sink_latency) if sink_latency else raw
+                listener = logging_setup.setup_logging(level="INFO", json_output=False, stream=stream)
+                results[name] = _time_per_message(emit, messages)
+                listener.stop()
+                logging.getLogger().handlers.clear()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--sink-latency-us", type=float, default=200)
+    args = parser.parse_args()
+    print(f"{'sink':<8}{'config':<10}{'us/message (loop thread)':>26}{'vs legacy':>12}")
+    for sink, latency in (("file", 0.0), ("slow", args.sink_latency_us / 1e6)):
+        # Sink lambat: pesan lebih sedikit supaya legacy tidak berjalan terlalu lama.
+        results = run(args.messages if not latency else max(1, args.messages // 10), latency)
+        baseline = results["legacy"]
+        for name, value in results.items():
+            print(f"{sink:<8}{name:<10}{value:>26.2f}{value / baseline:>11.2f}x")
@@ -0,0 +1,120 @@
+"""Membandingkan profil runtime (utils/runtime_profile.py): update per detik per core.
+
+Setiap profil dijalankan di proses terpisah (event loop harus dipilih sebelum loop dibuat)
+yang di-pin ke satu CPU, lalu menjalankan skenario benchmarks.bench_e2e dengan json_loads /
+json_dumps profil tersebut di sesi bot. Dilaporkan:
+  upd/s      throughput wall clock pada satu core
+  upd/cpu-s  update per detik CPU thread event loop (tanpa server PostgREST palsu), median N run
+  json codec biaya json_loads(update) + json_dumps(payload balasan) saja, per update
+
+    python -m benchmarks.bench_runtime [--profiles standard fast] [--updates 3000] [--repeat 5]
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import subprocess
+import sys
+import time
+
+from benchmarks import bench_e2e
+
+DEFAULT_SCENARIOS = ["chatter", "hot_triggers", "inline_search"]
+
+
+def _pin_to_one_cpu() -> str:
+    if not hasattr(os, "sched_setaffinity"):
+        return "unpinned"
+    cpu = min(os.sched_getaffinity(0))
+    os.sched_setaffinity(0, {cpu})
+    return f"cpu{cpu}"
+
+
+def run_child(args):
+    from utils import runtime_profile
+
+    logging.basicConfig(level=logging.CRITICAL, force=True)
+    pinned = _pin_to_one_cpu()
+    profile = runtime_profile.resolve(args.child)
+    results = profile.run(bench_e2e.run_suite(args.scenarios, args.updates, args.concurrency, 0.0, 0.0,
+                                              measure_alloc=False, session_kwargs=profile.session_kwargs()))
+    print(json.dumps({"profile": profile.describe(), "pinned": pinned, "scenarios": results}))
+
+
+def _run_profile(name: str, args) -> dict:
+    command = [sys.executable, "-m", "benchmarks.bench_runtime", "--child", name,
+               "--updates", str(args.updates), "--concurrency", str(args.concurrency), "--scenarios", *args.scenarios]
+    env = dict(os.environ, INLINE_DEBOUNCE_SECONDS="0")
+    output = subprocess.run(command, capture_output=True, text=True, check=True, env=env).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def _median_runs(runs: list) -> dict:
+    """Median per skenario dari beberapa run satu profil (selisih antarprofil biasanya kecil)."""
+    merged = dict(runs[0], scenarios={})
+    for scenario in runs[0]["scenarios"]:
+        rows = sorted((run["scenarios"][scenario] for run in runs), key=lambda row: row["updates_per_cpu_sec"])
+        merged["scenarios"][scenario] = rows[len(rows) // 2]
+    return merged
+
+
+def codec_cost_us(profile, sample_updates: list) -> float:
+    """Biaya json_loads(update) + json_dumps(payload sendMessage) per update, tanpa aiogram."""
+    loads = profile.json_loads or json.loads  # bawaan BaseSession aiogram
+    dumps = profile.json_dumps or json.dumps
+    raw = [dumps(update) for update in sample_updates]
+    payload = {"chat_id": -1001234567890, "text": "Halo <a href=\"tg://user?id=1\">User</a>!", "reply_to_message_id": 42,
+               "reply_markup": {"inline_keyboard": [[{"text": f"Button {i}", "callback_data": f"del:{i}"}] for i in range(7)]}}
+    started = time.perf_counter()
+    for _ in range(20):
+        for item in raw:
+            loads(item)
+            dumps(payload)
+    return (time.perf_counter() - started) / (20 * len(raw)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--profiles", nargs="+", default=["standard", "fast"])
+    parser.add_argument("--scenarios", nargs="+", choices=sorted(bench_e2e.SCENARIOS), default=DEFAULT_SCENARIOS)
+    parser.add_argument("--updates", type=int, default=3000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=5, help="jalankan N kali per profil, ambil median")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        run_child(args)
+        return
+
+    # Profil dijalankan bergantian per putaran supaya drift mesin tidak berat sebelah.
+    collected = {name: [] for name in args.profiles}
+    for _ in range(args.repeat):
+        for name in args.profiles:
+            collected[name].append(_run_profile(name, args))
+    runs = {name: _median_runs(profile_runs) for name, profile_runs in collected.items()}
+
+    from utils import runtime_profile
+    sample = bench_e2e.scenario_chatter(500, random.Random(1))
+    for name, run in runs.items():
+        cost = codec_cost_us(runtime_profile.resolve(name), sample)
+        print(f"{name:<10} {run['profile']} [{run['pinned']}], json codec {cost:.1f} us/update")
+    print()
+    baseline = runs[args.profiles[0]]["scenarios"]
+    header = f"{'scenario':<16}{'profile':<10}{'upd/s':>9}{'upd/cpu-s':>11}{'p99 ms':>9}"
+    if len(runs) > 1:
+        header += f"{'vs ' + args.profiles[0]:>16}"
+    print(header)
+    for scenario in args.scenarios:
+        for name, run in runs.items():
+            row = run["scenarios"][scenario]
+            line = (f"{scenario:<16}{name:<10}{row['updates_per_sec']:>9.0f}{row['updates_per_cpu_sec']:>11.0f}"
+                    f"{row['latency_ms']['p99']:>9.2f}")
+            if len(runs) > 1:
+                ratio = row["updates_per_cpu_sec"] / baseline[scenario]["updates_per_cpu_sec"] - 1
+                line += f"{ratio * 100:>+15.1f}%"
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
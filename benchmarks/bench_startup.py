@@ -0,0 +1,90 @@
+"""Mengukur cold start: impor modul bot, warm-up cache, dan waktu sampai update pertama dijawab.
+
+Memakai FakeSupabaseServer + FakeTelegramSession, jadi seluruh jalur startup asli
+(bot.create_dispatcher, bot.prepare_bot, Dispatcher.start_polling) ikut terukur.
+
+    python -m benchmarks.bench_startup [--db-latency 0.05] [--api-latency 0.02] [--serial]
+"""
+import time
+
+_PROCESS_T0 = time.perf_counter()
+
+import argparse
+import asyncio
+import logging
+import os
+
+from benchmarks.fake_supabase import FakeSupabaseServer, FAKE_SUPABASE_KEY
+
+# Sama dengan benchmarks.fake_telegram.FAKE_BOT_TOKEN; modul itu mengimpor aiogram,
+# jadi baru diimpor setelah waktu impor bot diukur.
+FAKE_BOT_TOKEN = "123456789:AAFakeTokenForBenchmarksOnly_abcdefghij"
+
+TRIGGER_COUNT = 2000
+
+
+async def run(args, server: FakeSupabaseServer) -> dict:
+    marks = {}
+    t0 = time.perf_counter()
+    import bot as bot_module
+    from aiogram import Bot
+    from utils import startup
+    marks["import_ms"] = (time.perf_counter() - t0) * 1000
+    from benchmarks.fake_telegram import FakeTelegramSession, make_message_update
+
+    session = FakeTelegramSession(latency=args.api_latency)
+    bot = Bot(token=FAKE_BOT_TOKEN, session=session)
+    dp = bot_module.create_dispatcher()
+
+    t0 = time.perf_counter()
+    if args.serial:
+        results = await startup.warm_up(bot, concurrent=False)
+        await bot.delete_webhook(drop_pending_updates=True)
+    else:
+        results = await bot_module.prepare_bot(bot)
+    marks["warmup_ms"] = (time.perf_counter() - t0) * 1000
+    marks["warmup_ok"] = all(results.values())
+
+    t0 = time.perf_counter()
+    polling = asyncio.create_task(dp.start_polling(bot, handle_signals=False, polling_timeout=1,
+                                                   allowed_updates=dp.resolve_used_update_types()))
+    session.push_update(make_message_update(1, chat_id=-100, user_id=42, text="trigger 7"))
+    await asyncio.wait_for(session.sent.get(), timeout=30)
+    marks["first_update_ms"] = (time.perf_counter() - t0) * 1000
+    marks["process_to_first_update_ms"] = (time.perf_counter() - _PROCESS_T0) * 1000
+
+    await dp.stop_polling()
+    await polling
+    return marks
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--db-latency", type=float, default=0.05, help="latency tiap request PostgREST (detik)")
+    parser.add_argument("--api-latency", type=float, default=0.02, help="latency tiap request Bot API (detik)")
+    parser.add_argument("--serial", action="store_true", help="warm-up satu per satu (pembanding)")
+    args = parser.parse_args()
+
+    server = FakeSupabaseServer(latency=args.db_latency).start()
+    server.seed_rows("learned_triggers", [
+        {"trigger_text": f"trigger {i}", "response_type": "text", "response_content": f"reply {i}", "creator_id": 1}
+        for i in range(TRIGGER_COUNT)
+    ])
+    server.seed_rows("bot_admins", [{"user_id": 1000 + i, "added_by": 1} for i in range(10)])
+    os.environ.update({"SUPABASE_URL": server.url, "SUPABASE_KEY": FAKE_SUPABASE_KEY, "BOT_TOKEN": FAKE_BOT_TOKEN})
+    logging.basicConfig(level=logging.CRITICAL, force=True)
+    try:
+        marks = asyncio.run(run(args, server))
+    finally:
+        server.stop()
+
+    mode = "serial" if args.serial else "concurrent"
+    print(f"warm-up mode:                {mode}")
+    print(f"import bot modules:          {marks['import_ms']:8.1f} ms")
+    print(f"warm-up (caches ok={marks['warmup_ok']!s:<5}):  {marks['warmup_ms']:8.1f} ms")
+    print(f"polling start -> 1st reply:  {marks['first_update_ms']:8.1f} ms")
+    print(f"script start -> 1st reply:   {marks['process_to_first_update_ms']:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""Benchmark memori: seluruh learned_triggers sebagai list dict vs TriggerStore (heap) vs snapshot mmap.
+
+Untuk setiap ukuran diukur:
+  heap MiB        memori Python yang dialokasikan (tracemalloc) untuk struktur tersebut
+  file MiB        ukuran snapshot (hanya mmap; halaman file ini dibagi antarproses)
+  lookup us       rata-rata get() untuk trigger acak
+  worker priv MiB memori privat tambahan sebuah worker hasil fork setelah membaca semua trigger
+                  (dict: refcount membuat halaman copy-on-write tersalin; mmap: tetap dibagi)
+
+    python -m benchmarks.bench_trigger_memory [--sizes 100000 1000000] [--no-fork]
+"""
+import argparse
+import gc
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+from utils.trigger_store import TriggerStore
+
+RESPONSE_TYPES = ("text", "photo", "animation", "sticker")
+LOOKUPS = 100_000
+
+
+def make_rows(count: int) -> list:
+    """Baris seperti yang dikembalikan PostgREST untuk learned_triggers (select *)."""
+    rows = []
+    for i in range(count):
+        response_type = RESPONSE_TYPES[i % len(RESPONSE_TYPES)]
+        # file_id Telegram ~70 karakter; sebagian media dipakai ulang oleh beberapa trigger.
+        content = (f"Halo {{mention}}, ini respons nomor {i}" if response_type == "text"
+                   else f"AgACAgUAAxkBAAI{(i % 50_000):010d}{response_type}_file_unique_id_padding_abcdefghijkl")
+        rows.append({
+            "id": i + 1,
+            "trigger_text": f"trigger phrase {i:07d}",
+            "response_type": response_type,
+            "response_content": content,
+            "creator_id": 1000 + i % 20,
+            "created_at": "2024-05-01T12:00:00.000000+00:00",
+        })
+    return rows
+
+
+def _traced(factory):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    value = factory()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return value, used
+
+
+def _lookup_us(get, keys: list) -> float:
+    started = time.perf_counter()
+    for key in keys:
+        get(key)
+    return (time.perf_counter() - started) / len(keys) * 1e6
+
+
+def _private_kib(pid: str = "self") -> int:
+    total = 0
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            if line.startswith(("Private_Clean:", "Private_Dirty:")):
+                total += int(line.split()[1])
+    return total
+
+
+def _forked_private_mib(touch) -> float:
+    """Menjalankan `touch` di proses anak hasil fork dan mengukur pertambahan memori privatnya."""
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_fd)
+        before = _private_kib()
+        touch()
+        os.write(write_fd, str(_private_kib() - before).encode())
+        os._exit(0)
+    os.close(write_fd)
+    with os.fdopen(read_fd) as pipe:
+        grown_kib = int(pipe.read() or 0)
+    os.waitpid(pid, 0)
+    return grown_kib / 1024
+
+
+def _touch_rows(rows: list):
+    total = 0
+    for row in rows:
+        total += len(row["trigger_text"]) + len(row["response_content"])
+    return total
+
+
+def _touch_store(store: TriggerStore):
+    def touch():
+        for record in store:
+            len(record.response_content)
+    return touch
+
+
+def run_size(count: int, fork: bool, snapshot_dir: str) -> dict:
+    results = {}
+    rng = random.Random(count)
+    keys = [f"trigger phrase {rng.randrange(count):07d}" for _ in range(LOOKUPS)]
+
+    rows, heap = _traced(lambda: make_rows(count))
+    by_text = {row["trigger_text"]: row for row in rows}
+    results["dicts"] = {"heap_mib": heap / 2**20, "file_mib": 0.0,
+                        "lookup_us": _lookup_us(by_text.get, keys),
+                        "worker_private_mib": _forked_private_mib(lambda: _touch_rows(rows)) if fork else None}
+    del by_text
+
+    started = time.perf_counter()
+    store, heap = _traced(lambda: TriggerStore.build(rows))
+    build_seconds = time.perf_counter() - started
+    results["store"] = {"heap_mib": heap / 2**20, "file_mib": 0.0, "lookup_us": _lookup_us(store.get, keys),
+                        "worker_private_mib": _forked_private_mib(_touch_store(store)) if fork else None,
+                        "build_s": build_seconds}
+
+    path = os.path.join(snapshot_dir, f"triggers-{count}.snap")
+    store.save(path)
+    del rows, store
+    gc.collect()
+    mapped, heap = _traced(lambda: TriggerStore.open(path))
+    results["mmap"] = {"heap_mib": heap / 2**20, "file_mib": os.path.getsize(path) / 2**20,
+                       "lookup_us": _lookup_us(mapped.get, keys),
+                       "worker_private_mib": _forked_private_mib(_touch_store(mapped)) if fork else None}
+    mapped.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", nargs="+", type=int, default=[100_000, 1_000_000])
+    parser.add_argument("--no-fork", action="store_true", help="lewati pengukuran worker hasil fork")
+    args = parser.parse_args()
+    fork = not args.no_fork and hasattr(os, "fork") and os.path.exists("/proc/self/smaps_rollup")
+
+    print(f"{'triggers':>10} {'layout':<7}{'heap MiB':>10}{'file MiB':>10}{'lookup us':>11}{'worker priv MiB':>17}")
+    with tempfile.TemporaryDirectory() as snapshot_dir:
+        for count in args.sizes:
+            for layout, row in run_size(count, fork, snapshot_dir).items():
+                worker = f"{row['worker_private_mib']:>17.1f}" if row["worker_private_mib"] is not None else f"{'-':>17}"
+                print(f"{count:>10} {layout:<7}{row['heap_mib']:>10.1f}{row['file_mib']:>10.1f}"
+                      f"{row['lookup_us']:>11.2f}{worker}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,336 @@
+"""Server PostgREST palsu (subset kecil) untuk benchmark & uji ketahanan lapisan database.
+
+Server berjalan di thread sendiri (event loop terpisah), jadi klien supabase sync yang
+dipanggil lewat asyncio.to_thread bisa menembaknya seperti Supabase sungguhan.
+Fault injection: latency (+jitter), 5xx acak, dan connection reset acak.
+
+    with FakeSupabaseServer(latency=0.01, error_rate=0.1) as server:
+        database.set_client(server.make_client())
+
+FakeSupabaseProcess menjalankan server yang sama di proses anak, supaya alokasi memori dan
+CPU server (encode JSON, dll.) tidak ikut terukur di proses benchmark (tracemalloc melihat
+semua thread).
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+from datetime import datetime, timezone
+
+from aiohttp import web
+
+FAKE_SUPABASE_KEY = "fake.supabase.key"
+
+DEFAULT_UNIQUE_COLUMNS = {
+    "learned_triggers": "trigger_text",
+    "bot_admins": "user_id",
+    "bot_chats": "chat_id",
+}
+TIMESTAMP_COLUMNS = {
+    "learned_triggers": "created_at",
+    "bot_admins": "added_at",
+}
+RESERVED_PARAMS = {"select", "limit", "offset", "order", "on_conflict", "columns"}
+
+
+def _coerce(value: str, sample):
+    if isinstance(sample, bool):
+        return value == "true"
+    if isinstance(sample, int):
+        try:
+            return int(value)
+        except ValueError:
+            return value
+    return value
+
+
+def _matches(row: dict, column: str, expr: str) -> bool:
+    op, _, raw = expr.partition(".")
+    current = row.get(column)
+    if op == "is":
+        return current is None if raw == "null" else str(current).lower() == raw
+    if op == "in":
+        options = [item.strip('"') for item in raw.strip("()").split(",")]
+        return str(current) in options
+    value = _coerce(raw, current)
+    if current is None:
+        return False
+    if op == "eq":
+        return current == value
+    if op == "neq":
+        return current != value
+    if op == "gt":
+        return current > value
+    if op == "gte":
+        return current >= value
+    if op == "lt":
+        return current < value
+    if op == "lte":
+        return current <= value
+    if op in ("like", "ilike"):
+        prefix = raw.replace("*", "%").rstrip("%")
+        target = str(current)
+        return target.lower().startswith(prefix.lower()) if op == "ilike" else target.startswith(prefix)
+    raise ValueError(f"Unsupported operator {op}")
+
+
+class FakeSupabaseServer:
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0,
+                 reset_rate: float = 0.0, seed: int = 1234, unique_columns: dict = None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.reset_rate = reset_rate
+        self.random = random.Random(seed)
+        self.unique_columns = dict(DEFAULT_UNIQUE_COLUMNS, **(unique_columns or {}))
+        self.tables = {}
+        self.stats = {"requests": 0, "errors_injected": 0, "resets_injected": 0}
+        self._next_id = {}
+        self._loop = None
+        self._runner = None
+        self._thread = None
+        self._ready = threading.Event()
+        self.port = None
+
+    # --- lifecycle ---
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="fake-supabase", daemon=True)
+        self._thread.start()
+        self._ready.wait(10)
+        return self
+
+    def stop(self):
+        if self._loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop).result(10)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(10)
+        self._loop = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    async def _shutdown(self):
+        try:
+            await asyncio.wait_for(self._runner.cleanup(), 1)
+        except asyncio.TimeoutError:
+            pass  # handler yang masih "hang" tidak perlu ditunggu
+        current = asyncio.current_task()
+        leftovers = [task for task in asyncio.all_tasks() if task is not current]
+        for task in leftovers:
+            task.cancel()
+        await asyncio.gather(*leftovers, return_exceptions=True)
+
+    def make_client(self, timeout: float = 5.0):
+        from supabase import create_client
+        from supabase.lib.client_options import ClientOptions
+        return create_client(self.url, FAKE_SUPABASE_KEY, options=ClientOptions(postgrest_client_timeout=timeout))
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        app = web.Application()
+        app.router.add_route("*", "/rest/v1/{table}", self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        self._loop.run_until_complete(self._runner.setup())
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        self._loop.run_until_complete(site.start())
+        self.port = site._server.sockets[0].getsockname()[1]
+        self._ready.set()
+        self._loop.run_forever()
+
+    # --- data helpers ---
+    def seed_rows(self, table: str, rows: list):
+        for row in rows:
+            self._insert_row(table, dict(row))
+
+    def _insert_row(self, table: str, row: dict) -> dict:
+        rows = self.tables.setdefault(table, [])
+        if "id" not in row:
+            self._next_id[table] = self._next_id.get(table, 0) + 1
+            row["id"] = self._next_id[table]
+        ts_column = TIMESTAMP_COLUMNS.get(table)
+        if ts_column and ts_column not in row:
+            row[ts_column] = datetime.now(timezone.utc).isoformat()
+        rows.append(row)
+        return row
+
+    def _filter(self, table: str, query) -> list:
+        rows = self.tables.get(table, [])
+        filters = [(key, value) for key, value in query.items() if key not in RESERVED_PARAMS]
+        return [row for row in rows if all(_matches(row, col, expr) for col, expr in filters)]
+
+    @staticmethod
+    def _project(rows: list, select: str) -> list:
+        if not select or select == "*":
+            return [dict(row) for row in rows]
+        columns = [col.strip() for col in select.split(",")]
+        return [{col: row.get(col) for col in columns} for row in rows]
+
+    # --- request handling ---
+    async def _inject_faults(self, request: web.Request):
+        delay = self.latency + (self.random.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay:
+            await asyncio.sleep(delay)
+        roll = self.random.random()
+        if roll < self.reset_rate:
+            self.stats["resets_injected"] += 1
+            request.transport.abort()
+            raise ConnectionResetError("injected connection reset")
+        if roll < self.reset_rate + self.error_rate:
+            self.stats["errors_injected"] += 1
+            return web.Response(status=503, text="<html>503 Service Unavailable</html>", content_type="text/html")
+        return None
+
+    async def _handle(self, request: web.Request):
+        self.stats["requests"] += 1
+        fault = await self._inject_faults(request)
+        if fault is not None:
+            return fault
+
+        table = request.match_info["table"]
+        query = request.query
+        prefer = request.headers.get("Prefer", "")
+        try:
+            if request.method == "GET" or request.method == "HEAD":
+                rows = self._filter(table, query)
+                status, result = 200, self._select(rows, query)
+                total = len(rows)
+            elif request.method == "POST":
+                status, result = self._post(table, await request.json(), query, prefer)
+                total = len(result) if isinstance(result, list) else 0
+            elif request.method == "PATCH":
+                changes = await request.json()
+                result = self._filter(table, query)
+                for row in result:
+                    row.update(changes)
+                status, total = 200, len(result)
+            elif request.method == "DELETE":
+                result = self._filter(table, query)
+                ids = {id(row) for row in result}
+                self.tables[table] = [row for row in self.tables.get(table, []) if id(row) not in ids]
+                status, total = 200, len(result)
+            else:
+                return web.json_response({"message": "method not allowed"}, status=405)
+        except ValueError as e:
+            return web.json_response({"code": "PGRST100", "message": str(e), "details": None, "hint": None}, status=400)
+
+        if isinstance(result, dict):  # error body
+            return web.json_response(result, status=status)
+        headers = {}
+        if "count=exact" in prefer:
+            headers["Content-Range"] = f"0-{max(len(result) - 1, 0)}/{total}" if total else "*/0"
+        if request.method != "GET" and "return=representation" not in prefer:
+            return web.Response(status=201 if request.method == "POST" else 204, headers=headers)
+        return web.Response(status=201 if request.method == "POST" else status, headers=headers,
+                            text=json.dumps(self._project(result, query.get("select", "*")), default=str),
+                            content_type="application/json")
+
+    def _select(self, rows: list, query) -> list:
+        order = query.get("order")
+        if order:
+            column, _, direction = order.partition(".")
+            rows = sorted(rows, key=lambda row: (row.get(column) is None, row.get(column)),
+                          reverse=direction.startswith("desc"))
+        offset = int(query.get("offset", 0))
+        limit = query.get("limit")
+        rows = rows[offset:offset + int(limit)] if limit is not None else rows[offset:]
+        return rows
+
+    def _post(self, table: str, body, query, prefer: str):
+        payload = body if isinstance(body, list) else [body]
+        unique = query.get("on_conflict") or self.unique_columns.get(table)
+        merge = "resolution=merge-duplicates" in prefer
+        ignore = "resolution=ignore-duplicates" in prefer
+        existing = {row.get(unique): row for row in self.tables.get(table, [])} if unique else {}
+        written = []
+        for item in payload:
+            key = item.get(unique) if unique else None
+            if unique and key in existing:
+                if merge:
+                    existing[key].update(item)
+                    written.append(existing[key])
+                    continue
+                if ignore:
+                    continue
+                return 409, {"code": "23505", "message": f"duplicate key value violates unique constraint on {unique}",
+                             "details": f"Key ({unique})=({key}) already exists.", "hint": None}
+            row = self._insert_row(table, dict(item))
+            existing[key] = row
+            written.append(row)
+        return 201, written
+
+
+class FakeSupabaseProcess:
+    """FakeSupabaseServer di proses terpisah. seed_rows dikirim lewat stdin (satu baris JSON per tabel)."""
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0,
+                 reset_rate: float = 0.0, seed: int = 1234):
+        self._options = {"latency": latency, "jitter": jitter, "error_rate": error_rate,
+                         "reset_rate": reset_rate, "seed": seed}
+        self._process = None
+        self.port = None
+
+    url = FakeSupabaseServer.url
+    make_client = FakeSupabaseServer.make_client
+
+    def start(self):
+        command = [sys.executable, "-m", "benchmarks.fake_supabase"]
+        for name, value in self._options.items():
+            command += [f"--{name.replace('_', '-')}", str(value)]
+        self._process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True,
+                                         cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        self.port = int(self._process.stdout.readline())
+        return self
+
+    def seed_rows(self, table: str, rows: list):
+        self._process.stdin.write(json.dumps({"table": table, "rows": rows}, default=str) + "\n")
+        self._process.stdin.flush()
+        self._process.stdout.readline()  # "ok" setelah baris tersimpan
+
+    def stop(self):
+        if self._process is None:
+            return
+        self._process.stdin.close()  # anak berhenti saat stdin ditutup
+        try:
+            self._process.wait(10)
+        except subprocess.TimeoutExpired:
+            self._process.kill()
+        self._process = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def _serve(args):
+    with FakeSupabaseServer(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                            reset_rate=args.reset_rate, seed=args.seed) as server:
+        print(server.port, flush=True)
+        for line in sys.stdin:
+            message = json.loads(line)
+            server.seed_rows(message["table"], message["rows"])
+            print("ok", flush=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--reset-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=1234)
+    _serve(parser.parse_args())
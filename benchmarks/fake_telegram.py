@@ -0,0 +1,157 @@
+"""Sesi Bot API palsu (in-process) untuk benchmark.
+
+FakeTelegramSession menggantikan AiohttpSession: setiap method Telegram dicatat, payload-nya
+di-serialize seperti sesi asli (prepare_value -> json_dumps), lalu dijawab dengan respons JSON
+sintetis yang di-decode lewat check_response() (json_loads + validasi pydantic) — jadi
+biaya encode/decode aiogram tetap terukur, hanya jaringannya yang hilang.
+getUpdates dilayani dari antrean, sehingga Dispatcher.start_polling() juga bisa dipakai.
+"""
+import asyncio
+import time
+from typing import Any, AsyncGenerator, Dict, Optional
+
+from aiogram import Bot
+from aiogram.client.session.base import BaseSession
+from aiogram.methods import TelegramMethod
+from aiogram.methods.base import TelegramType
+
+FAKE_BOT_TOKEN = "123456789:AAFakeTokenForBenchmarksOnly_abcdefghij"
+FAKE_BOT_ID = 123456789
+
+MESSAGE_METHODS = {
+    "sendMessage", "sendPhoto", "sendAnimation", "sendSticker", "sendDocument",
+    "editMessageText", "editMessageReplyMarkup",
+}
+
+
+class FakeTelegramSession(BaseSession):
+    def __init__(self, latency: float = 0.0, **kwargs):
+        super().__init__(**kwargs)
+        self.latency = latency
+        self.calls = []
+        self.updates = asyncio.Queue()
+        self.sent = asyncio.Queue()
+        self.failures = {}  # chat_id -> (status_code, description) untuk mensimulasikan error
+        self._message_id = 0
+
+    # --- update feeding ---
+    def push_update(self, update: dict):
+        self.updates.put_nowait(update)
+
+    async def _get_updates(self, method) -> list:
+        try:
+            first = await asyncio.wait_for(self.updates.get(), timeout=method.timeout or 0.01)
+        except asyncio.TimeoutError:
+            return []
+        batch = [first]
+        while not self.updates.empty() and len(batch) < (method.limit or 100):
+            batch.append(self.updates.get_nowait())
+        return batch
+
+    # --- BaseSession API ---
+    async def make_request(self, bot: Bot, method: TelegramMethod[TelegramType], timeout: Optional[int] = None) -> TelegramType:
+        api_method = method.__api_method__
+        files: Dict[str, Any] = {}
+        payload = {}
+        for key, value in method.model_dump(warnings=False).items():
+            value = self.prepare_value(value, bot=bot, files=files)
+            if value:
+                payload[key] = value
+        self.calls.append((api_method, payload))
+
+        if api_method == "getUpdates":
+            result = await self._get_updates(method)
+        else:
+            if self.latency:
+                await asyncio.sleep(self.latency)
+            failure = self.failures.get(payload.get("chat_id"))
+            if failure is not None:
+                status_code, description = failure
+                content = self.json_dumps({"ok": False, "error_code": status_code, "description": description})
+                self.check_response(bot=bot, method=method, status_code=status_code, content=content)
+            result = self._result_for(api_method, payload)
+
+        content = self.json_dumps({"ok": True, "result": result})
+        response = self.check_response(bot=bot, method=method, status_code=200, content=content)
+        if api_method in MESSAGE_METHODS:
+            self.sent.put_nowait((api_method, payload))
+        return response.result
+
+    async def stream_content(self, url: str, headers: Optional[Dict[str, Any]] = None, timeout: int = 30,
+                             chunk_size: int = 65536, raise_for_status: bool = True) -> AsyncGenerator[bytes, None]:
+        yield b""
+
+    async def close(self) -> None:
+        pass
+
+    # --- synthetic results ---
+    def _result_for(self, api_method: str, payload: dict):
+        if api_method == "getMe":
+            return {"id": FAKE_BOT_ID, "is_bot": True, "first_name": "Fake Bot", "username": "fake_bot"}
+        if api_method in MESSAGE_METHODS:
+            self._message_id += 1
+            chat_id = payload.get("chat_id", 0)
+            message = {
+                "message_id": self._message_id,
+                "date": int(time.time()),
+                "chat": {"id": chat_id if isinstance(chat_id, int) else 0, "type": "private"},
+                "from": {"id": FAKE_BOT_ID, "is_bot": True, "first_name": "Fake Bot"},
+            }
+            if "text" in payload:
+                message["text"] = payload["text"]
+            return message
+        return True
+
+
+# --- update builders ---
+def make_user(user_id: int, language_code: str = "en") -> dict:
+    return {"id": user_id, "is_bot": False, "first_name": f"User{user_id}", "username": f"user{user_id}",
+            "language_code": language_code}
+
+
+def make_message_update(update_id: int, chat_id: int, user_id: int, text: str, chat_type: str = "group") -> dict:
+    chat = {"id": chat_id, "type": chat_type}
+    if chat_type != "private":
+        chat["title"] = f"Chat {chat_id}"
+    message = {
+        "message_id": update_id,
+        "date": int(time.time()),
+        "chat": chat,
+        "from": make_user(user_id),
+        "text": text,
+    }
+    if text.startswith("/"):
+        command = text.split()[0]
+        message["entities"] = [{"type": "bot_command", "offset": 0, "length": len(command)}]
+    return {"update_id": update_id, "message": message}
+
+
+def make_callback_update(update_id: int, chat_id: int, user_id: int, data: str, message_id: int = 1) -> dict:
+    return {
+        "update_id": update_id,
+        "callback_query": {
+            "id": str(update_id),
+            "from": make_user(user_id),
+            "chat_instance": str(chat_id),
+            "data": data,
+            "message": {
+                "message_id": message_id,
+                "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "private"},
+                "from": {"id": FAKE_BOT_ID, "is_bot": True, "first_name": "Fake Bot"},
+                "text": "menu",
+            },
+        },
+    }
+
+
+def make_inline_query_update(update_id: int, user_id: int, query: str, offset: str = "") -> dict:
+    return {
+        "update_id": update_id,
+        "inline_query": {
+            "id": str(update_id),
+            "from": make_user(user_id),
+            "query": query,
+            "offset": offset,
+        },
+    }
@@ -5,18 +5,46 @@ logger = logging.getLogger(__name__)
 from aiogram import Bot, Dispatcher
 from aiogram.fsm.storage.memory import MemoryStorage
 from aiogram.client.bot import DefaultBotProperties
+from aiogram.client.session.aiohttp import AiohttpSession
 from aiogram.enums import ParseMode
 
 
-from config import BOT_TOKEN, SUPER_ADMIN_ID 
-from utils import database, admin_manager 
+from config import BOT_TOKEN, SUPER_ADMIN_ID, HEALTH_PORT 
+from utils import logging_setup, startup, readiness, profiler, chat_registry, runtime_profile, audit_log, trigger_manager
 from handlers import common
 
-async def main():
-    log_format = '%(asctime)s - %(levelname)s - %(name)s - [%(filename)s:%(lineno)d] - %(message)s'
-    logging.basicConfig(level=logging.INFO, format=log_format, force=True) 
 
-    logging.info("Konfigurasi logging selesai di fungsi main.")
+def create_dispatcher() -> Dispatcher:
+    storage = MemoryStorage()
+    dp = Dispatcher(storage=storage)
+
+    dp.include_router(common.router)
+    logging.info("Router telah di-include.")
+    return dp
+
+
+async def prepare_bot(bot: Bot) -> dict:
+    """Warm-up cache + hapus webhook secara bersamaan; tandai siap hanya jika semua cache hangat."""
+    warmup_results, _ = await asyncio.gather(
+        startup.warm_up(bot),
+        bot.delete_webhook(drop_pending_updates=True),
+    )
+
+    if not warmup_results.get("supabase_client"):
+        logging.error("Klien Supabase GAGAL diinisialisasi. Operasi database tidak akan berfungsi.")
+    elif not warmup_results.get("admin_cache"):
+        logging.error("Gagal memuat admin ke cache saat startup.")
+    else:
+        logging.info("Admin berhasil dimuat ke cache saat startup.")
+
+    if all(warmup_results.values()):
+        readiness.mark_ready()
+    return warmup_results
+
+
+async def main(profile: runtime_profile.RuntimeProfile = None):
+    profile = profile or runtime_profile.resolve()
+    logging.info(f"Runtime profile {profile.describe()}; running loop: {runtime_profile.active_loop_name()}.")
 
     if not BOT_TOKEN:
         logging.error("BOT_TOKEN tidak ditemukan! Bot tidak bisa berjalan.")
@@ -25,42 +53,56 @@ async def main():
 
     if SUPER_ADMIN_ID is None:
         logging.warning("SUPER_ADMIN_ID tidak diset di .env! Fitur manajemen admin mungkin tidak berfungsi dengan benar.")
-        
-
-    if not database.supabase:
-        logging.error("Klien Supabase GAGAL diinisialisasi. Operasi database tidak akan berfungsi.")
-        
-    else:
-        logging.info("Klien Supabase berhasil diinisialisasi.")
-        
-        if not await admin_manager.load_admins_to_cache():
-             logging.error("Gagal memuat admin ke cache saat startup.")
-        else:
-             logging.info("Admin berhasil dimuat ke cache saat startup.")
 
+    probe_runner = await readiness.start_probe_server(HEALTH_PORT) if HEALTH_PORT else None
+    loop_monitor = profiler.start_loop_monitor()
 
-    bot = Bot(token=BOT_TOKEN, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
-    storage = MemoryStorage()
-    dp = Dispatcher(storage=storage)
+    bot = Bot(token=BOT_TOKEN, session=AiohttpSession(**profile.session_kwargs()),
+              default=DefaultBotProperties(parse_mode=ParseMode.HTML))
+    dp = create_dispatcher()
 
-    dp.include_router(common.router)
-    logging.info("Router telah di-include.")
-
-    await bot.delete_webhook(drop_pending_updates=True)
+    warmup_task = None
+    chat_flush_task = chat_registry.start_flusher()
+    audit_task = audit_log.start_writer()
+    refresh_task = trigger_manager.start_refresher()
     try:
+        warmup_results = await prepare_bot(bot)
+        if not all(warmup_results.values()):
+            # Tetap polling (trigger tetap dilayani lewat DB), tapi belum dilaporkan siap.
+            warmup_task = asyncio.create_task(startup.keep_warming(bot, warmup_results))
+
         logging.info("Memulai polling bot...")
         await dp.start_polling(bot, allowed_updates=dp.resolve_used_update_types())
     except Exception as e:
         logging.error(f"Terjadi error saat polling: {e}", exc_info=True)
     finally:
+        readiness.mark_not_ready()
+        if loop_monitor:
+            loop_monitor.stop()
+        if warmup_task:
+            warmup_task.cancel()
+        if refresh_task:
+            refresh_task.cancel()
+        # Chat baru yang belum sempat di-flush ditulis sebelum sesi ditutup.
+        await chat_registry.stop_flusher(chat_flush_task)
+        await audit_log.stop_writer(audit_task)
+        if probe_runner:
+            await probe_runner.cleanup()
         if hasattr(bot, 'session') and bot.session: 
             await bot.session.close()
         logging.info("Polling bot selesai.")
 
 if __name__ == '__main__':
+    # Log ditulis oleh thread QueueListener, bukan di event loop. Listener baru dihentikan setelah
+    # baris log terakhir di bawah, supaya antreannya masih dikuras.
+    log_listener = logging_setup.setup_logging()
+    logging.info("Konfigurasi logging selesai.")
     try:
-        asyncio.run(main())
+        profile = runtime_profile.resolve()
+        profile.run(main(profile))
     except (KeyboardInterrupt, SystemExit):
         logging.info("Bot dihentikan secara manual.")
     except Exception as e:
         logging.critical(f"Terjadi error fatal di level atas: {e}", exc_info=True)
+    finally:
+        log_listener.stop()
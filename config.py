@@ -13,3 +13,62 @@ if super_admin_id_str and super_admin_id_str.isdigit():
     SUPER_ADMIN_ID = int(super_admin_id_str)
 else:
     pass
+
+# Batas waktu & circuit breaker untuk operasi database (lihat utils/resilience.py)
+DB_TIMEOUT_SECONDS = float(os.getenv("DB_TIMEOUT_SECONDS", "5"))
+DB_READ_TIMEOUT_SECONDS = float(os.getenv("DB_READ_TIMEOUT_SECONDS", "2"))
+DB_BREAKER_FAILURE_THRESHOLD = int(os.getenv("DB_BREAKER_FAILURE_THRESHOLD", "5"))
+DB_BREAKER_RESET_SECONDS = float(os.getenv("DB_BREAKER_RESET_SECONDS", "30"))
+DB_HEDGE_READS = os.getenv("DB_HEDGE_READS", "false").lower() in ("1", "true", "yes")
+DB_HEDGE_MIN_DELAY_SECONDS = float(os.getenv("DB_HEDGE_MIN_DELAY_SECONDS", "0.05"))
+
+# Logging (lihat utils/logging_setup.py)
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_JSON = os.getenv("LOG_JSON", "false").lower() in ("1", "true", "yes")
+LOG_SAMPLE_INTERVAL_SECONDS = float(os.getenv("LOG_SAMPLE_INTERVAL_SECONDS", "10"))
+
+# Startup & readiness (lihat utils/startup.py dan utils/readiness.py)
+WARMUP_TIMEOUT_SECONDS = float(os.getenv("WARMUP_TIMEOUT_SECONDS", "10"))
+WARMUP_RETRY_SECONDS = float(os.getenv("WARMUP_RETRY_SECONDS", "30"))
+# Trigger yang ditambah/dihapus di luar proses ini (worker lain, dashboard Supabase) baru
+# terlihat setelah indeks dimuat ulang tiap TRIGGER_REFRESH_SECONDS (0 = tidak pernah).
+TRIGGER_REFRESH_SECONDS = float(os.getenv("TRIGGER_REFRESH_SECONDS", "300"))
+# Memuat seluruh learned_triggers (per halaman) bisa jauh lebih lama dari langkah warm-up lain.
+TRIGGER_LOAD_TIMEOUT_SECONDS = float(os.getenv("TRIGGER_LOAD_TIMEOUT_SECONDS", "300"))
+READY_FILE = os.getenv("READY_FILE")
+health_port_str = os.getenv("HEALTH_PORT")
+HEALTH_PORT = int(health_port_str) if health_port_str and health_port_str.isdigit() else None
+
+# Profiling & pemantauan event loop (lihat utils/profiler.py)
+PROFILE_SAMPLE_INTERVAL_MS = float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", "5"))
+PROFILE_MAX_SECONDS = int(os.getenv("PROFILE_MAX_SECONDS", "120"))
+LOOP_LAG_THRESHOLD_MS = float(os.getenv("LOOP_LAG_THRESHOLD_MS", "100"))  # 0 = nonaktif
+
+# Inline mode (lihat utils/inline_index.py)
+INLINE_RESULTS_LIMIT = int(os.getenv("INLINE_RESULTS_LIMIT", "20"))
+INLINE_CACHE_TIME = int(os.getenv("INLINE_CACHE_TIME", "300"))
+INLINE_DEBOUNCE_SECONDS = float(os.getenv("INLINE_DEBOUNCE_SECONDS", "0.3"))
+INLINE_RESULT_CACHE_SIZE = int(os.getenv("INLINE_RESULT_CACHE_SIZE", "4096"))
+
+# Registry chat dan /broadcast (lihat utils/chat_registry.py, utils/broadcast.py)
+CHAT_REGISTRY_FLUSH_SECONDS = float(os.getenv("CHAT_REGISTRY_FLUSH_SECONDS", "30"))
+CHAT_REGISTRY_BATCH_SIZE = int(os.getenv("CHAT_REGISTRY_BATCH_SIZE", "500"))
+BROADCAST_WORKERS = int(os.getenv("BROADCAST_WORKERS", "8"))
+BROADCAST_RATE_PER_SECOND = float(os.getenv("BROADCAST_RATE_PER_SECOND", "25"))  # batas global Bot API ~30/detik
+BROADCAST_PAGE_SIZE = int(os.getenv("BROADCAST_PAGE_SIZE", "500"))
+BROADCAST_PROGRESS_SECONDS = float(os.getenv("BROADCAST_PROGRESS_SECONDS", "3"))
+
+# Snapshot trigger store (lihat utils/trigger_store.py). Kosong = tidak memakai snapshot.
+# Worker yang memakai path yang sama berbagi satu file: snapshot yang umurnya di bawah
+# TRIGGER_SNAPSHOT_MAX_AGE_SECONDS dipakai ulang, hanya yang lebih tua dibangun ulang dari DB.
+TRIGGER_SNAPSHOT_PATH = os.getenv("TRIGGER_SNAPSHOT_PATH", "")
+TRIGGER_SNAPSHOT_MAX_AGE_SECONDS = float(os.getenv("TRIGGER_SNAPSHOT_MAX_AGE_SECONDS", str(TRIGGER_REFRESH_SECONDS / 2)))
+
+# Profil runtime: "standard" (asyncio + json) atau "fast" (uvloop + orjson, lihat utils/runtime_profile.py)
+RUNTIME_PROFILE = os.getenv("RUNTIME_PROFILE", "standard").strip().lower()
+
+# Audit log admin (lihat utils/audit_log.py)
+AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", "100"))
+AUDIT_FLUSH_SECONDS = float(os.getenv("AUDIT_FLUSH_SECONDS", "2"))
+AUDIT_SHUTDOWN_TIMEOUT_SECONDS = float(os.getenv("AUDIT_SHUTDOWN_TIMEOUT_SECONDS", "10"))
+AUDIT_PAGE_SIZE = int(os.getenv("AUDIT_PAGE_SIZE", "10"))
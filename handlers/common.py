@@ -1,6 +1,6 @@
 from aiogram import Router, F, Bot
 from aiogram.filters import CommandStart, Command, CommandObject
-from aiogram.types import Message, ReplyKeyboardRemove, CallbackQuery
+from aiogram.types import Message, ReplyKeyboardRemove, CallbackQuery, BufferedInputFile, InlineQuery
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 from aiogram.utils.keyboard import InlineKeyboardBuilder, InlineKeyboardButton
@@ -9,18 +9,22 @@ import os
 import logging
 import math
 import html
+import asyncio
 from datetime import datetime
 from zoneinfo import ZoneInfo
 from typing import Union
-from utils import trigger_manager, admin_manager, database
-from config import SUPER_ADMIN_ID
+from utils import trigger_manager, admin_manager, database, profiler, inline_index, chat_registry, broadcast, audit_log
+from config import SUPER_ADMIN_ID, PROFILE_MAX_SECONDS, INLINE_RESULTS_LIMIT, INLINE_CACHE_TIME, INLINE_DEBOUNCE_SECONDS, AUDIT_PAGE_SIZE
 from aiogram.enums import ParseMode
 
 router = Router()
 TRIGGERS_PER_PAGE = 7
 
 
-def load_locale(lang_code, file_path='locales'):
+# Locale dibaca dari disk sekali lalu disimpan; handler hanya membaca (.get) dict-nya.
+_locale_cache = {}
+
+def _read_locale_file(lang_code, file_path='locales'):
     base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     locale_path = os.path.join(base_dir, file_path, f'{lang_code}.json')
     fallback_locale_path = os.path.join(base_dir, file_path, 'en.json')
@@ -32,6 +36,22 @@ def load_locale(lang_code, file_path='locales'):
         except FileNotFoundError:
             logging.error(f"Fallback locale en.json not found at {fallback_locale_path}"); return {}
 
+def load_locale(lang_code, file_path='locales'):
+    key = (lang_code, file_path)
+    locale = _locale_cache.get(key)
+    if locale is None:
+        locale = _read_locale_file(lang_code, file_path)
+        _locale_cache[key] = locale
+    return locale
+
+def preload_locales(file_path='locales') -> bool:
+    """Memuat semua file locale ke cache (dipanggil saat warm-up startup)."""
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    for file_name in os.listdir(os.path.join(base_dir, file_path)):
+        if file_name.endswith('.json'):
+            load_locale(file_name[:-len('.json')], file_path)
+    return bool(_locale_cache)
+
 
 class LearnStates(StatesGroup):
     waiting_for_trigger = State()
@@ -184,6 +204,8 @@ async def save_learned_trigger_final(message_or_cq: Union[Message, CallbackQuery
         logging.error(f"Missing trigger_text in FSM data for user {user_obj.id}."); return
     creator_id = user_obj.id 
     result = await trigger_manager.add_trigger(trigger_text, actual_response_type, response_content, creator_id)
+    audit_log.record(creator_id, "trigger.add", trigger_text, success=result is True, response_type=actual_response_type,
+                     response_content=response_content, result="exists" if result == "exists" else None)
     response_message_key = ""; format_params = {}
     if result is True:
         if actual_response_type == "text": response_message_key = "learn_response_received_text"; format_params = {"response": response_content, "trigger": trigger_text}
@@ -270,7 +292,9 @@ async def cmd_add_admin(message: Message, command: CommandObject):
         await message.reply(locales.get("add_admin_already_admin").format(user_id=target_user_id))
         return
 
-    if await admin_manager.add_admin(target_user_id, message.from_user.id): # Sudah benar dengan await
+    added = await admin_manager.add_admin(target_user_id, message.from_user.id)
+    audit_log.record(message.from_user.id, "admin.add", target_user_id, success=added)
+    if added:
         await message.reply(locales.get("add_admin_success").format(user_id=target_user_id))
     else:
         await message.reply(locales.get("add_admin_failed").format(user_id=target_user_id))
@@ -297,7 +321,9 @@ async def cmd_remove_admin(message: Message, command: CommandObject):
         await message.reply(locales.get("remove_admin_not_admin").format(user_id=target_user_id))
         return
 
-    if await admin_manager.remove_admin(target_user_id): # Sudah benar dengan await
+    removed = await admin_manager.remove_admin(target_user_id)
+    audit_log.record(message.from_user.id, "admin.remove", target_user_id, success=removed)
+    if removed:
         await message.reply(locales.get("remove_admin_success").format(user_id=target_user_id))
     else:
         await message.reply(locales.get("remove_admin_failed").format(user_id=target_user_id))
@@ -312,6 +338,9 @@ async def cmd_list_admins(message: Message):
         return
 
     admin_records = await database.get_all_admins_from_db() 
+    if admin_records is None:
+        # DB tidak bisa dihubungi: tampilkan ID dari cache tanpa detail added_by/added_at.
+        admin_records = [{'user_id': user_id} for user_id in sorted(await admin_manager.get_cached_admins())]
 
     reply_text = locales.get("list_admins_title") + "\n"
     found_any_admin = False
@@ -340,6 +369,155 @@ async def cmd_list_admins(message: Message):
 
     await message.reply(reply_text)
 
+# --- Profiling (Admin Only) ---
+@router.message(Command("profile"))
+async def cmd_profile(message: Message, command: CommandObject, bot: Bot):
+    user_lang = message.from_user.language_code if message.from_user else 'en'
+    locales = load_locale(user_lang)
+
+    if not await admin_manager.is_user_admin(message.from_user.id):
+        await message.reply(locales.get("permission_denied_admin_command"))
+        return
+
+    seconds_str = command.args.strip() if command.args else ""
+    if not seconds_str.isdigit() or not 1 <= int(seconds_str) <= PROFILE_MAX_SECONDS:
+        await message.reply(locales.get("profile_usage", "Usage: /profile [seconds]").format(max_seconds=PROFILE_MAX_SECONDS))
+        return
+    # Slot dipesan sebelum await pertama, supaya /profile kedua yang datang bersamaan langsung ditolak.
+    if not profiler.claim_profile():
+        await message.reply(locales.get("profile_busy", "A profiling session is already running."))
+        return
+
+    seconds = int(seconds_str)
+    try:
+        await message.reply(locales.get("profile_started", "Profiling...").format(seconds=seconds))
+    except Exception:
+        profiler.release_profile()
+        raise
+    logging.info(f"Admin {message.from_user.id} started a {seconds}s profiling session.")
+    result = await profiler.profile_event_loop(seconds)
+
+    summary = result.summary()
+    stamp = datetime.now(ZoneInfo("UTC")).strftime("%Y%m%d-%H%M%S")
+    await bot.send_document(
+        message.chat.id,
+        BufferedInputFile(result.flamegraph_svg().encode("utf-8"), filename=f"profile-{stamp}.svg"),
+        caption=locales.get("profile_flamegraph_caption", "Flamegraph").format(seconds=seconds),
+    )
+    await bot.send_document(
+        message.chat.id,
+        BufferedInputFile((summary + "\n\n# collapsed stacks\n" + result.collapsed_stacks()).encode("utf-8"),
+                          filename=f"profile-{stamp}.txt"),
+        caption=locales.get("profile_stacks_caption", "Collapsed stacks"),
+    )
+    await message.answer(f"<pre>{html.escape(summary[:3900])}</pre>", parse_mode=ParseMode.HTML)
+
+# --- Broadcast (Admin Only) ---
+@router.message(Command("broadcast"))
+async def cmd_broadcast(message: Message, command: CommandObject, bot: Bot):
+    user_lang = message.from_user.language_code if message.from_user else 'en'
+    locales = load_locale(user_lang)
+
+    if not await admin_manager.is_user_admin(message.from_user.id):
+        await message.reply(locales.get("permission_denied_admin_command"))
+        return
+
+    # Balas pesan apa pun (teks/media) dengan /broadcast untuk menyalinnya, atau /broadcast [teks].
+    if message.reply_to_message:
+        source_chat_id, source_message_id = message.chat.id, message.reply_to_message.message_id
+        send = lambda chat_id: bot.copy_message(chat_id, source_chat_id, source_message_id)
+    elif command.args:
+        # Teks dikirim apa adanya: di bawah parse mode HTML bawaan, "<" atau "&" membuat semua kiriman gagal.
+        text = command.args
+        send = lambda chat_id: bot.send_message(chat_id, text, parse_mode=None)
+    else:
+        await message.reply(locales.get("broadcast_usage", "Usage: reply to a message with /broadcast, or /broadcast [text]"))
+        return
+    # Slot dipesan sebelum await pertama, supaya /broadcast kedua yang datang bersamaan langsung ditolak.
+    job = broadcast.claim_broadcast(send)
+    if job is None:
+        await message.reply(locales.get("broadcast_busy", "Another broadcast is already running."))
+        return
+
+    try:
+        status_message = await message.reply(locales.get("broadcast_started", "Broadcast started..."))
+    except Exception:
+        broadcast.release_broadcast(job)
+        raise
+    logging.info(f"Admin {message.from_user.id} started a broadcast.")
+    last_status = [None]
+
+    async def report(progress: broadcast.Broadcast):
+        key = "broadcast_done" if progress.finished else "broadcast_progress"
+        status = locales.get(key, "{processed}/{total}").format(
+            processed=progress.processed, total=progress.total if progress.total is not None else "?",
+            sent=progress.sent, failed=progress.failed, pruned=len(progress.pruned),
+            rate=f"{progress.rate:.1f}", elapsed=f"{progress.elapsed:.0f}",
+        )
+        if status != last_status[0]:  # Telegram menolak edit dengan teks yang sama
+            last_status[0] = status
+            await status_message.edit_text(status)
+
+    await broadcast.run_broadcast(job, on_progress=report)
+
+# --- Audit Log (Admin Only) ---
+AUDIT_PAGE_CALLBACK_PREFIX = "audit_page:"
+
+def _format_audit_event(event: dict, locales: dict) -> str:
+    created_at = event.get('created_at') or ""
+    try:
+        created_at = datetime.fromisoformat(created_at.replace("Z", "+00:00")).strftime("%Y-%m-%d %H:%M")
+    except ValueError:
+        pass
+    return locales.get("audit_entry", "{time} — {actor} {action} {target}{failed}").format(
+        time=created_at, actor=event.get('actor_id'), action=event.get('action'),
+        target=html.escape(str(event.get('target', ""))[:50]),
+        failed="" if event.get('success', True) else locales.get("audit_failed_marker", " (failed)"),
+    )
+
+async def _send_audit_page(message_or_cq: Union[Message, CallbackQuery], before_id=None):
+    user_lang = message_or_cq.from_user.language_code if message_or_cq.from_user else 'en'
+    locales = load_locale(user_lang)
+    if not await admin_manager.is_user_admin(message_or_cq.from_user.id):
+        if isinstance(message_or_cq, CallbackQuery): await message_or_cq.answer(locales.get("permission_denied_admin_command"), show_alert=True)
+        else: await message_or_cq.reply(locales.get("permission_denied_admin_command"))
+        return
+
+    events, next_cursor = await audit_log.get_page(before_id, AUDIT_PAGE_SIZE)
+    builder = InlineKeyboardBuilder()
+    if events is None:
+        text = locales.get("audit_unavailable", "The audit log is unavailable right now.")
+    elif not events:
+        text = locales.get("audit_empty", "No audit events yet.")
+    else:
+        lines = [locales.get("audit_title", "Audit log:")]
+        lines.extend(_format_audit_event(event, locales) for event in events)
+        text = "\n".join(lines)
+        nav_buttons = []
+        if before_id is not None:
+            nav_buttons.append(InlineKeyboardButton(text=locales.get("button_audit_newest", "⏮ Newest"), callback_data=f"{AUDIT_PAGE_CALLBACK_PREFIX}"))
+        if next_cursor is not None:
+            nav_buttons.append(InlineKeyboardButton(text=locales.get("button_audit_older", "Older ▶"), callback_data=f"{AUDIT_PAGE_CALLBACK_PREFIX}{next_cursor}"))
+        if nav_buttons: builder.row(*nav_buttons)
+    pending = audit_log.pending_count()
+    if pending and before_id is None:
+        text += "\n\n" + locales.get("audit_pending", "{count} recent events are still being written.").format(count=pending)
+
+    if isinstance(message_or_cq, CallbackQuery):
+        try: await message_or_cq.message.edit_text(text, reply_markup=builder.as_markup())
+        except Exception as e: logging.info(f"Failed to edit msg for audit page: {e}")
+        await message_or_cq.answer()
+    else: await message_or_cq.answer(text, reply_markup=builder.as_markup())
+
+@router.message(Command("audit"))
+async def cmd_audit(message: Message):
+    await _send_audit_page(message)
+
+@router.callback_query(F.data.startswith(AUDIT_PAGE_CALLBACK_PREFIX))
+async def process_audit_page_callback(callback_query: CallbackQuery):
+    cursor = callback_query.data[len(AUDIT_PAGE_CALLBACK_PREFIX):]
+    await _send_audit_page(callback_query, int(cursor) if cursor.isdigit() else None)
+
 # --- Delete Trigger Command and Handlers ---
 DELETE_CALLBACK_PREFIX = "del_trigger:"
 DELETE_PAGE_CALLBACK_PREFIX = "del_page:"
@@ -351,16 +529,21 @@ async def _send_delete_trigger_page(message_or_cq: Union[Message, CallbackQuery]
         if isinstance(message_or_cq, CallbackQuery): await message_or_cq.answer(locales.get("permission_denied_delete"), show_alert=True)
         else: await message_or_cq.answer(locales.get("permission_denied_delete")); return
     logging.info(f"Admin {user_id} accessing delete trigger page: {page}")
-    all_triggers = await trigger_manager.get_all_triggers_for_admins()
-    if not all_triggers:
-        logging.info(f"No triggers found for admin {user_id} to delete (page: {page}).")
-        text = locales.get("delete_trigger_list_empty")
+    # Hanya halaman yang ditampilkan yang diambil dari DB, bukan seluruh daftar trigger.
+    start_index = page * TRIGGERS_PER_PAGE; end_index = start_index + TRIGGERS_PER_PAGE
+    triggers_page = await trigger_manager.get_triggers_page_for_admins(start_index, TRIGGERS_PER_PAGE)
+    if triggers_page is None or not triggers_page[1]:
+        if triggers_page is None:
+            text = locales.get("delete_trigger_list_unavailable", "The trigger list could not be loaded right now.")
+        else:
+            logging.info(f"No triggers found for admin {user_id} to delete (page: {page}).")
+            text = locales.get("delete_trigger_list_empty")
         if isinstance(message_or_cq, CallbackQuery): await message_or_cq.message.edit_text(text, reply_markup=None)
-        else: await message_or_cq.answer(text); return
-    total_items = len(all_triggers); total_pages = math.ceil(total_items / TRIGGERS_PER_PAGE)
+        else: await message_or_cq.answer(text)
+        return
+    triggers_on_page, total_items = triggers_page
+    total_pages = math.ceil(total_items / TRIGGERS_PER_PAGE)
     current_page_display = page + 1
-    start_index = page * TRIGGERS_PER_PAGE; end_index = start_index + TRIGGERS_PER_PAGE
-    triggers_on_page = all_triggers[start_index:end_index]
     builder = InlineKeyboardBuilder()
     if not triggers_on_page and page > 0:
         logging.warning(f"Admin {user_id} requested empty page {page}. Resetting to 0.")
@@ -425,7 +608,12 @@ async def process_confirm_delete_yes(callback_query: CallbackQuery, state: FSMCo
         try: await callback_query.message.edit_text("Error: No trigger found to delete. Try /deletetrigger.", reply_markup=None)
         except: await callback_query.message.answer("Error: No trigger found to delete. Try /deletetrigger.")
         await state.clear(); await callback_query.answer(); return
+    # Respons lama (dari trigger store, atau DB jika store belum dimuat) dicatat utuh sebelum dihapus,
+    # supaya trigger yang terhapus masih bisa dipulihkan dari audit log.
+    previous = await trigger_manager.get_response_for_trigger(trigger_text_to_delete) or {}
     deleted = await trigger_manager.delete_trigger(trigger_text_to_delete)
+    audit_log.record(callback_query.from_user.id, "trigger.delete", trigger_text_to_delete, success=deleted,
+                     response_type=previous.get('response_type'), response_content=previous.get('response_content'))
     final_text = ""
     if deleted: final_text = locales.get("delete_trigger_successful").format(trigger_text=trigger_text_to_delete); logging.info(f"Deleted '{trigger_text_to_delete}'.")
     else: final_text = locales.get("delete_trigger_not_found_or_failed").format(trigger_text=trigger_text_to_delete); logging.warning(f"Failed to delete '{trigger_text_to_delete}'.")
@@ -470,9 +658,77 @@ async def cmd_placeholders(message: Message):
     await message.answer(response_text, parse_mode=ParseMode.MARKDOWN)
 
 
+# --- Inline Mode ---
+# Query inline terbaru per user; query lama yang sudah tergantikan selama debounce tidak dijawab.
+_latest_inline_query = {}
+
+@router.inline_query()
+async def handle_inline_query(inline_query: InlineQuery, bot: Bot):
+    user_id = inline_query.from_user.id
+    # Halaman berikutnya (offset terisi) diminta saat user scroll, jadi tidak perlu di-debounce.
+    if not inline_query.offset and INLINE_DEBOUNCE_SECONDS > 0:
+        _latest_inline_query[user_id] = inline_query.id
+        await asyncio.sleep(INLINE_DEBOUNCE_SECONDS)
+        if _latest_inline_query.get(user_id) != inline_query.id:
+            return
+        del _latest_inline_query[user_id]
+
+    offset = int(inline_query.offset) if inline_query.offset.isdigit() else 0
+    matches, next_offset = trigger_manager.search_inline(inline_query.query.strip(), offset, INLINE_RESULTS_LIMIT)
+
+    results = []
+    is_personal = False
+    for trigger_text, response_type, content, result in matches:
+        if result is None:
+            bot_user = await bot.me()
+            text = render_text_response(content, inline_query.from_user, None, bot_user)
+            result = inline_index.build_result(trigger_text, response_type, content, text)
+            is_personal = True
+        results.append(result)
+
+    try:
+        await inline_query.answer(results, cache_time=INLINE_CACHE_TIME, is_personal=is_personal,
+                                  next_offset=str(next_offset) if next_offset is not None else "")
+    except Exception as e:
+        # Biasanya "query is too old" karena user sudah mengetik query lain.
+        logging.debug("Failed to answer inline query %s: %s", inline_query.id, e)
+
+
 # --- General Message Handler ---
+def render_text_response(content: str, user=None, chat=None, bot_user=None) -> str:
+    """Mengganti placeholder ({mention}, {datetime}, {chat_title}, ...) pada respons teks."""
+    if "{" not in content:
+        return content
+    processed_content = content
+
+    utc_now = datetime.now(ZoneInfo("UTC"))
+    wib_now = utc_now.astimezone(ZoneInfo("Asia/Jakarta"))
+
+    processed_content = processed_content.replace("{date}", wib_now.strftime("%Y-%m-%d"))
+    processed_content = processed_content.replace("{time}", wib_now.strftime("%H:%M:%S"))
+    processed_content = processed_content.replace("{datetime}", wib_now.strftime("%Y-%m-%d %H:%M:%S"))
+
+    if user:
+        processed_content = processed_content.replace("{firstname}", html.escape(user.first_name))
+        processed_content = processed_content.replace("{lastname}", html.escape(user.last_name or ""))
+        processed_content = processed_content.replace("{fullname}", html.escape(user.full_name))
+        processed_content = processed_content.replace("{username}", html.escape(user.username or ""))
+        processed_content = processed_content.replace("{id}", str(user.id))
+        processed_content = processed_content.replace("{mention}", user.mention_html())
+
+    # Inline query tidak punya chat; placeholder chat dikosongkan.
+    processed_content = processed_content.replace("{chat_id}", str(chat.id) if chat else "")
+    processed_content = processed_content.replace("{chat_title}", html.escape(chat.title or "") if chat else "")
+
+    if bot_user:
+        processed_content = processed_content.replace("{bot_firstname}", html.escape(bot_user.first_name))
+        processed_content = processed_content.replace("{bot_username}", html.escape(bot_user.username or ""))
+    return processed_content
+
+
 @router.message(F.text)
 async def handle_triggered_messages(message: Message, bot: Bot, state: FSMContext):
+    chat_registry.track_chat(message.chat)
     current_state_str = await state.get_state()
     if current_state_str is not None: return
     if not message.text or message.text.startswith('/'): return
@@ -488,33 +744,8 @@ async def handle_triggered_messages(message: Message, bot: Bot, state: FSMContex
 
         try:
             if response_type == "text":
-                processed_content = content
-
-                utc_now = datetime.now(ZoneInfo("UTC"))
-                wib_now = utc_now.astimezone(ZoneInfo("Asia/Jakarta"))
-                
-                processed_content = processed_content.replace("{date}", wib_now.strftime("%Y-%m-%d"))
-                processed_content = processed_content.replace("{time}", wib_now.strftime("%H:%M:%S"))
-                processed_content = processed_content.replace("{datetime}", wib_now.strftime("%Y-%m-%d %H:%M:%S"))
-
-                if message.from_user:
-                    user = message.from_user
-                    processed_content = processed_content.replace("{firstname}", html.escape(user.first_name))
-                    processed_content = processed_content.replace("{lastname}", html.escape(user.last_name or ""))
-                    processed_content = processed_content.replace("{fullname}", html.escape(user.full_name))
-                    processed_content = processed_content.replace("{username}", html.escape(user.username or ""))
-                    processed_content = processed_content.replace("{id}", str(user.id))
-                    processed_content = processed_content.replace("{mention}", user.mention_html())
-
-                if message.chat:
-                    processed_content = processed_content.replace("{chat_id}", str(message.chat.id))
-                    processed_content = processed_content.replace("{chat_title}", html.escape(message.chat.title or ""))
-
-                if bot:
-                    bot_user = await bot.get_me()
-                    processed_content = processed_content.replace("{bot_firstname}", html.escape(bot_user.first_name))
-                    processed_content = processed_content.replace("{bot_username}", html.escape(bot_user.username or ""))
-
+                bot_user = await bot.me() if bot else None
+                processed_content = render_text_response(content, message.from_user, message.chat, bot_user)
                 await message.reply(processed_content)
             elif response_type == "photo":
                 await bot.send_photo(message.chat.id, content, reply_to_message_id=message.message_id)
@@ -0,0 +1,47 @@
+import pytest
+
+from benchmarks.fake_supabase import FakeSupabaseServer
+from utils import database, resilience
+from utils.resilience import CircuitBreaker
+
+
+@pytest.fixture(scope="session")
+def dispatcher():
+    # Router hanya bisa di-include sekali per proses, jadi dispatcher dipakai bersama semua tes.
+    from bot import create_dispatcher
+    return create_dispatcher()
+
+
+@pytest.fixture
+def fake_supabase(monkeypatch):
+    """Pabrik FakeSupabaseServer yang dipasang sebagai klien DB selama satu tes.
+
+    fake_supabase(triggers=[...], failure_threshold=3, latency=0.1) menjalankan server berisi
+    baris learned_triggers tersebut, dengan breaker dan tracker latensi baru serta cache respons kosong.
+    Argumen lain (latency, jitter, error_rate, reset_rate) diteruskan ke FakeSupabaseServer.
+    """
+    servers = []
+
+    def start(triggers=(), failure_threshold=100, reset_timeout=0.1, timeout=2.0, **faults):
+        server = FakeSupabaseServer(**faults).start()
+        servers.append(server)
+        if triggers:
+            server.seed_rows("learned_triggers", list(triggers))
+        monkeypatch.setattr(database, "supabase", server.make_client(timeout=timeout))
+        monkeypatch.setattr(resilience, "breaker", CircuitBreaker(failure_threshold, reset_timeout))
+        monkeypatch.setattr(resilience, "read_latency", resilience.LatencyTracker())
+        database._response_cache.clear()
+        return server
+
+    yield start
+    for server in servers:
+        server.stop()
+
+
+@pytest.fixture
+def backend(fake_supabase):
+    """FakeSupabaseServer berisi data benchmarks.bench_e2e."""
+    from benchmarks.bench_e2e import seed_backend
+    server = fake_supabase()
+    seed_backend(server)
+    return server
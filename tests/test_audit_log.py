@@ -0,0 +1,42 @@
+"""Uji audit log (utils/audit_log.py) untuk penghapusan trigger lewat handler."""
+import asyncio
+
+import pytest
+from aiogram import Bot
+
+from benchmarks.bench_e2e import ADMIN_IDS
+from benchmarks.fake_telegram import FAKE_BOT_TOKEN, FakeTelegramSession, make_callback_update
+from utils import admin_manager, audit_log, trigger_manager
+
+LONG_RESPONSE = "Halo {mention}! " + "teks panjang " * 60
+
+
+@pytest.mark.parametrize("store_loaded", [True, False])
+def test_deleted_trigger_is_logged_in_full(backend, dispatcher, monkeypatch, store_loaded):
+    backend.seed_rows("learned_triggers", [
+        {"trigger_text": "long one", "response_type": "text", "response_content": LONG_RESPONSE, "creator_id": 1}])
+    monkeypatch.setattr(trigger_manager, "trigger_store", None)
+    admin_id = ADMIN_IDS[0]
+
+    async def scenario():
+        bot = Bot(token=FAKE_BOT_TOKEN, session=FakeTelegramSession())
+        await admin_manager.load_admins_to_cache()
+        if store_loaded:
+            assert await trigger_manager.load_trigger_index()
+        writer = audit_log.start_writer()
+        for update_id, data in enumerate(["del_trigger:long one", "confirm_delete_yes"], start=1):
+            await dispatcher.feed_raw_update(bot, make_callback_update(update_id, admin_id, admin_id, data))
+        await audit_log.stop_writer(writer)
+
+    asyncio.run(scenario())
+    events = [row for row in backend.tables.get("audit_log", []) if row["action"] == "trigger.delete"]
+    assert len(events) == 1
+    assert events[0]["success"] is True
+    assert events[0]["details"] == {"response_type": "text", "response_content": LONG_RESPONSE}
+    assert not any(row["trigger_text"] == "long one" for row in backend.tables["learned_triggers"])
+
+
+def test_added_trigger_content_is_truncated():
+    audit_log.record(1, "trigger.add", "x", response_type="text", response_content="a" * 500)
+    event = audit_log._queue.get_nowait()
+    assert len(event["details"]["response_content"]) == audit_log.MAX_CONTENT_LENGTH + 1
@@ -0,0 +1,94 @@
+"""Uji /broadcast (handlers/common.py + utils/broadcast.py) lewat Dispatcher dan Bot API palsu."""
+import asyncio
+from collections import Counter
+
+from aiogram import Bot
+from aiogram.client.bot import DefaultBotProperties
+from aiogram.enums import ParseMode
+
+from benchmarks.bench_e2e import ADMIN_IDS
+from benchmarks.fake_telegram import FAKE_BOT_TOKEN, FakeTelegramSession, make_message_update
+from utils import admin_manager, broadcast, chat_registry
+
+CHATS = [-1000 - i for i in range(40)]
+
+
+def _seed_chats(backend):
+    backend.seed_rows("bot_chats", [{"chat_id": chat_id, "chat_type": "group", "title": "x"} for chat_id in CHATS])
+
+
+def test_concurrent_broadcast_commands_send_once(backend, dispatcher, monkeypatch):
+    _seed_chats(backend)
+    monkeypatch.setattr(broadcast, "BROADCAST_RATE_PER_SECOND", 0)
+
+    async def scenario():
+        session = FakeTelegramSession(latency=0.01)
+        bot = Bot(token=FAKE_BOT_TOKEN, session=session)
+        await admin_manager.load_admins_to_cache()
+        updates = [make_message_update(i + 1, ADMIN_IDS[i], ADMIN_IDS[i], f"/broadcast hello {i}", chat_type="private")
+                   for i in range(2)]
+        await asyncio.gather(*(dispatcher.feed_raw_update(bot, update) for update in updates))
+        return session.calls
+
+    calls = asyncio.run(scenario())
+    delivered = Counter(payload["chat_id"] for method, payload in calls
+                        if method == "sendMessage" and payload.get("text", "").startswith("hello"))
+    assert sorted(int(chat_id) for chat_id in delivered) == sorted(CHATS)
+    assert set(delivered.values()) == {1}
+    assert not broadcast.broadcast_in_progress()
+
+
+def test_progress_never_exceeds_total(backend, monkeypatch):
+    _seed_chats(backend)
+    monkeypatch.setattr(chat_registry, "known_chat_ids", set())
+    monkeypatch.setattr(chat_registry, "_pending", {})
+
+    class Chat:
+        type, title, full_name = "group", "new", None
+
+        def __init__(self, chat_id):
+            self.id = chat_id
+
+    # Chat yang baru terlihat (belum di-flush) saat broadcast dimulai.
+    for chat_id in range(-5000, -5010, -1):
+        chat_registry.track_chat(Chat(chat_id))
+
+    async def send(chat_id):
+        return None
+
+    async def scenario():
+        seen = []
+
+        async def on_progress(progress):
+            seen.append((progress.processed, progress.total))
+
+        job = broadcast.claim_broadcast(send)
+        assert broadcast.claim_broadcast(send) is None
+        await broadcast.run_broadcast(job, on_progress)
+        return job, seen
+
+    job, seen = asyncio.run(scenario())
+    assert job.total == job.sent == len(CHATS) + 10
+    assert all(processed <= total for processed, total in seen)
+
+
+def test_broadcast_text_is_sent_without_html_parsing(backend, dispatcher, monkeypatch):
+    _seed_chats(backend)
+    monkeypatch.setattr(broadcast, "BROADCAST_RATE_PER_SECOND", 0)
+    text = "Promo <50% & gratis ongkir"
+
+    async def scenario():
+        session = FakeTelegramSession()
+        bot = Bot(token=FAKE_BOT_TOKEN, session=session, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
+        await admin_manager.load_admins_to_cache()
+        for update_id, command in enumerate(["/broadcast", f"/broadcast {text}"], start=1):
+            await dispatcher.feed_raw_update(
+                bot, make_message_update(update_id, ADMIN_IDS[0], ADMIN_IDS[0], command, chat_type="private"))
+        return session.calls
+
+    calls = asyncio.run(scenario())
+    usage = next(payload for method, payload in calls if method == "sendMessage")
+    assert usage["parse_mode"] == "HTML" and "<" not in usage["text"]  # bukan tag HTML yang ditolak Telegram
+    delivered = [payload for method, payload in calls if method == "sendMessage" and payload["text"] == text]
+    assert len(delivered) == len(CHATS)
+    assert all("parse_mode" not in payload for payload in delivered)
@@ -0,0 +1,49 @@
+"""Uji daftar /deletetrigger per halaman (handlers/common.py _send_delete_trigger_page)."""
+import asyncio
+import json
+
+from aiogram import Bot
+
+from benchmarks.bench_e2e import ADMIN_IDS, SEED_TRIGGERS
+from benchmarks.fake_telegram import FAKE_BOT_TOKEN, FakeTelegramSession, make_callback_update
+from handlers import common
+from utils import admin_manager, database
+
+
+def _open_page(dispatcher, page: int) -> dict:
+    async def scenario():
+        session = FakeTelegramSession()
+        bot = Bot(token=FAKE_BOT_TOKEN, session=session)
+        await admin_manager.load_admins_to_cache()
+        await dispatcher.feed_raw_update(bot, make_callback_update(
+            1, ADMIN_IDS[0], ADMIN_IDS[0], f"{common.DELETE_PAGE_CALLBACK_PREFIX}{page}"))
+        return session.calls
+
+    return next(payload for method, payload in asyncio.run(scenario()) if method == "editMessageText")
+
+
+def _buttons(payload: dict) -> list:
+    markup = payload.get("reply_markup") or {}
+    markup = json.loads(markup) if isinstance(markup, str) else markup
+    return [button["callback_data"] for row in markup.get("inline_keyboard", []) for button in row]
+
+
+def test_page_is_fetched_from_db_with_total(backend, dispatcher):
+    total_pages = -(-SEED_TRIGGERS // common.TRIGGERS_PER_PAGE)
+    payload = _open_page(dispatcher, 2)
+    buttons = _buttons(payload)
+
+    start = 2 * common.TRIGGERS_PER_PAGE
+    assert buttons[:common.TRIGGERS_PER_PAGE] == [
+        f"{common.DELETE_CALLBACK_PREFIX}trigger {i}" for i in range(start, start + common.TRIGGERS_PER_PAGE)]
+    assert buttons[common.TRIGGERS_PER_PAGE:] == ["del_page:1", "noop_page_display", "del_page:3"]
+    assert f"(Page 3/{total_pages})" in payload["text"]
+    assert not hasattr(database, "_last_all_triggers")
+
+
+def test_unavailable_db_is_reported(backend, dispatcher):
+    asyncio.run(admin_manager.load_admins_to_cache())
+    backend.error_rate = 1.0
+    payload = _open_page(dispatcher, 0)
+    assert "could not be loaded" in payload["text"]
+    assert _buttons(payload) == []
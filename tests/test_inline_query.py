@@ -0,0 +1,89 @@
+"""Uji inline mode (handlers/common.py handle_inline_query + utils/inline_index.py) lewat Dispatcher."""
+import asyncio
+import json
+
+import pytest
+from aiogram import Bot
+
+from benchmarks.fake_telegram import FAKE_BOT_TOKEN, FakeTelegramSession, make_inline_query_update
+from handlers import common
+from utils import inline_index, trigger_manager
+
+# Trigger disimpan dalam huruf kecil (lihat database.add_trigger_to_db); query boleh huruf besar.
+TRIGGERS = ["halo", "halo dunia", "hai", "help", "selamat pagi"] + [f"item {i:02d}" for i in range(25)]
+
+
+@pytest.fixture
+def inline_store(fake_supabase, monkeypatch):
+    monkeypatch.setattr(trigger_manager, "trigger_store", None)
+    monkeypatch.setattr(inline_index, "index", inline_index.InlineTriggerIndex())
+    monkeypatch.setattr(common, "INLINE_RESULTS_LIMIT", 10)
+    monkeypatch.setattr(common, "INLINE_DEBOUNCE_SECONDS", 0)
+    monkeypatch.setattr(common, "_latest_inline_query", {})
+    fake_supabase(triggers=[
+        {"trigger_text": text, "response_type": "text", "response_content": f"reply {text}", "creator_id": 1}
+        for text in TRIGGERS
+    ])
+    assert asyncio.run(trigger_manager.load_trigger_index())
+
+
+def _answers(calls) -> list:
+    answers = []
+    for method, payload in calls:
+        if method == "answerInlineQuery":
+            results = payload.get("results", [])
+            results = json.loads(results) if isinstance(results, str) else results
+            answers.append((payload["inline_query_id"], [result["title"] for result in results],
+                            payload.get("next_offset", "")))
+    return answers
+
+
+def _run_queries(dispatcher, updates, stagger: float = 0.0) -> list:
+    async def scenario():
+        session = FakeTelegramSession()
+        bot = Bot(token=FAKE_BOT_TOKEN, session=session)
+
+        async def feed(position, update):
+            await asyncio.sleep(position * stagger)
+            await dispatcher.feed_raw_update(bot, update)
+
+        await asyncio.gather(*(feed(position, update) for position, update in enumerate(updates)))
+        return session.calls
+
+    return _answers(asyncio.run(scenario()))
+
+
+def test_prefix_search_is_case_insensitive(inline_store, dispatcher):
+    answers = _run_queries(dispatcher, [make_inline_query_update(1, 42, "HA"), make_inline_query_update(2, 42, "Halo D")])
+    assert answers == [("1", ["hai", "halo", "halo dunia"], ""), ("2", ["halo dunia"], "")]
+
+
+def test_offset_pages_through_all_matches(inline_store, dispatcher):
+    pages, offset, update_id = [], "", 0
+    while True:
+        update_id += 1
+        [(_, titles, offset)] = _run_queries(dispatcher, [make_inline_query_update(update_id, 42, "item", offset)])
+        pages.append(titles)
+        if not offset:
+            break
+
+    assert [len(page) for page in pages] == [10, 10, 5]
+    assert [title for page in pages for title in page] == [f"item {i:02d}" for i in range(25)]
+
+
+def test_debounce_answers_only_the_latest_query(inline_store, dispatcher, monkeypatch):
+    monkeypatch.setattr(common, "INLINE_DEBOUNCE_SECONDS", 0.1)
+    updates = [make_inline_query_update(1, 42, "h"), make_inline_query_update(2, 42, "ha"),
+               make_inline_query_update(3, 42, "hal"), make_inline_query_update(4, 7, "sel")]
+    answers = _run_queries(dispatcher, updates, stagger=0.02)
+
+    # User 42 mengetik tiga huruf dalam jendela debounce: hanya query terakhirnya yang dijawab.
+    assert sorted(answers) == [("3", ["halo", "halo dunia"], ""), ("4", ["selamat pagi"], "")]
+    assert common._latest_inline_query == {}
+
+
+def test_next_page_is_not_debounced(inline_store, dispatcher, monkeypatch):
+    monkeypatch.setattr(common, "INLINE_DEBOUNCE_SECONDS", 0.1)
+    updates = [make_inline_query_update(1, 42, "item", "10"), make_inline_query_update(2, 42, "item", "20")]
+    answers = _run_queries(dispatcher, updates, stagger=0.02)
+    assert [(query_id, len(titles), offset) for query_id, titles, offset in answers] == [("1", 10, "20"), ("2", 5, "")]
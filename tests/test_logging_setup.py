@@ -0,0 +1,80 @@
+"""Uji utils/logging_setup.py: QueueHandler/QueueListener dan LogSampler."""
+import io
+import json
+import logging
+
+import pytest
+
+from utils import logging_setup
+
+
+@pytest.fixture
+def root_logger():
+    root = logging.getLogger()
+    handlers, level = root.handlers[:], root.level
+    yield root
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    for handler in handlers:
+        root.addHandler(handler)
+    root.setLevel(level)
+
+
+def test_message_is_formatted_before_args_change(root_logger):
+    stream = io.StringIO()
+    listener = logging_setup.setup_logging(level="INFO", json_output=False, stream=stream)
+    state = {"count": 1}
+    items = ["a"]
+    logging.info("state=%s items=%s", state, items)
+    state["count"] = 2
+    items.append("b")
+    listener.stop()
+    assert "state={'count': 1} items=['a']" in stream.getvalue()
+
+
+def test_traceback_is_kept_in_json_output(root_logger):
+    stream = io.StringIO()
+    listener = logging_setup.setup_logging(level="INFO", json_output=True, stream=stream)
+    try:
+        {}["missing"]
+    except KeyError:
+        logging.error("lookup failed for %s", "missing", exc_info=True)
+    listener.stop()
+    payload = json.loads(stream.getvalue().strip())
+    assert payload["msg"] == "lookup failed for missing"
+    assert "KeyError: 'missing'" in payload["exc"]
+
+
+def test_listener_stop_flushes_every_queued_line(root_logger):
+    stream = io.StringIO()
+    listener = logging_setup.setup_logging(level="INFO", json_output=False, stream=stream)
+    for i in range(2000):
+        logging.info("line %d", i)
+    listener.stop()
+    lines = stream.getvalue().splitlines()
+    assert len(lines) == 2000
+    assert lines[-1].endswith("line 1999")
+
+
+def test_sampler_suppresses_repeats_and_reports_count(root_logger, monkeypatch, caplog):
+    clock = [100.0]
+    monkeypatch.setattr(logging_setup.time, "monotonic", lambda: clock[0])
+    sampler = logging_setup.LogSampler(interval=10)
+    caplog.set_level(logging.INFO)
+
+    for _ in range(5):
+        sampler.log(logging.WARNING, "db_down", "DB down: %s", "timeout")
+    sampler.log(logging.WARNING, "other", "Other key")
+    clock[0] += 11
+    sampler.log(logging.WARNING, "db_down", "DB down: %s", "timeout")
+
+    messages = [record.getMessage() for record in caplog.records]
+    assert messages == ["DB down: timeout", "Other key", "DB down: timeout (4 similar messages suppressed)"]
+
+
+def test_sampler_skips_disabled_levels(root_logger, caplog):
+    caplog.set_level(logging.INFO)
+    sampler = logging_setup.LogSampler(interval=10)
+    sampler.log(logging.DEBUG, "noisy", "hidden")
+    assert caplog.records == []
+    assert sampler._state == {}
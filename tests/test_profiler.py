@@ -0,0 +1,104 @@
+"""Uji profiler (utils/profiler.py): atribusi waktu per handler, deteksi idle, /profile dan loop lag."""
+import asyncio
+import logging
+import os
+import time
+
+from aiogram import Bot
+
+from benchmarks.bench_e2e import ADMIN_IDS
+from benchmarks.fake_telegram import FAKE_BOT_TOKEN, FakeTelegramSession, make_message_update
+from utils import admin_manager, audit_log, chat_registry, profiler, runtime_profile
+
+
+def _fake_handler():
+    # Coroutine yang frame-nya tercatat berasal dari handlers/, seperti handler sungguhan.
+    namespace = {"asyncio": asyncio}
+    source = "async def handle_slow_command():\n    await asyncio.sleep(5)\n"
+    exec(compile(source, os.path.join(profiler.HANDLERS_DIR, "fake_handlers.py"), "exec"), namespace)
+    return namespace["handle_slow_command"]
+
+
+def test_background_tasks_are_not_reported_as_handlers():
+    async def scenario():
+        flusher = chat_registry.start_flusher(interval=60)
+        writer = audit_log.start_writer()
+        handler = asyncio.create_task(_fake_handler()())
+        try:
+            return await profiler.profile_event_loop(0.3, interval=10)
+        finally:
+            handler.cancel()
+            flusher.cancel()
+            await audit_log.stop_writer(writer)
+
+    result = asyncio.run(scenario())
+    assert list(result.handler_wall) == ["fake_handlers:handle_slow_command"]
+    assert all("chat_registry" not in name and "audit_log" not in name for name in result.await_wall)
+
+
+def test_project_file_excludes_in_repo_virtualenv_and_sibling_dirs():
+    project = profiler.PROJECT_DIR
+    assert profiler._is_project_file(os.path.join(project, "utils", "database.py"))
+    assert not profiler._is_project_file(os.path.join(project, ".venv", "lib", "python3.11", "site-packages",
+                                                      "aiogram", "dispatcher", "dispatcher.py"))
+    assert not profiler._is_project_file(project + "-old" + os.sep + "bot.py")
+    assert not profiler._is_handler_file(os.path.join(project, "handlers_backup", "common.py"))
+
+
+def _busy_share(result) -> float:
+    return 1 - result.idle / result.samples
+
+
+def test_idle_loop_is_detected_on_every_runtime():
+    async def idle():
+        return await profiler.profile_event_loop(0.3, interval=10)
+
+    async def blocked():
+        async def block():
+            await asyncio.sleep(0.02)
+            time.sleep(0.25)  # memblokir loop, seperti handler yang memanggil kode sync
+
+        task = asyncio.create_task(block())
+        result = await profiler.profile_event_loop(0.3, interval=10)
+        await task
+        return result
+
+    # asyncio.run saja tidak cukup: setelah aiogram diimpor, loop default-nya bisa uvloop.
+    runners = [runtime_profile.resolve("standard").run]
+    if runtime_profile.resolve("fast").loop_factory:
+        runners.append(runtime_profile.resolve("fast").run)
+    for run in runners:
+        assert _busy_share(run(idle())) < 0.2
+        assert _busy_share(run(blocked())) > 0.5
+
+
+def test_concurrent_profile_commands_run_once(backend, dispatcher, monkeypatch):
+    monkeypatch.setattr(profiler, "PROFILE_SAMPLE_INTERVAL_MS", 50)
+
+    async def scenario():
+        session = FakeTelegramSession(latency=0.01)
+        bot = Bot(token=FAKE_BOT_TOKEN, session=session)
+        await admin_manager.load_admins_to_cache()
+        updates = [make_message_update(i + 1, ADMIN_IDS[i], ADMIN_IDS[i], "/profile 1", chat_type="private")
+                   for i in range(2)]
+        await asyncio.gather(*(dispatcher.feed_raw_update(bot, update) for update in updates))
+        return session.calls
+
+    calls = asyncio.run(scenario())
+    replies = [payload["text"] for method, payload in calls if method == "sendMessage"]
+    assert sum("already running" in text for text in replies) == 1
+    assert sum(method == "sendDocument" for method, _ in calls) == 2  # flamegraph + ringkasan, sekali saja
+    assert not profiler.profile_in_progress()
+
+
+def test_lag_is_reported_once_per_stall(caplog):
+    async def scenario():
+        monitor = profiler.start_loop_monitor(threshold_ms=50)
+        await asyncio.sleep(0.05)
+        time.sleep(0.3)
+        await asyncio.sleep(0.1)
+        monitor.stop()
+
+    caplog.set_level(logging.WARNING)
+    asyncio.run(scenario())
+    assert len([record for record in caplog.records if "[LOOP_LAG]" in record.getMessage()]) == 1
@@ -0,0 +1,159 @@
+"""Uji lapisan ketahanan database (utils/resilience.py) terhadap FakeSupabaseServer."""
+import asyncio
+import threading
+import time
+
+import pytest
+
+from utils import database, resilience
+from utils.resilience import CircuitBreaker, CircuitOpenError
+
+TRIGGERS = [f"trigger {i}" for i in range(5)]
+
+
+@pytest.fixture(autouse=True)
+def server(fake_supabase):
+    return fake_supabase(triggers=[
+        {"trigger_text": text, "response_type": "text", "response_content": f"reply {text}", "creator_id": 1}
+        for text in TRIGGERS
+    ], failure_threshold=3, reset_timeout=0.2, timeout=1.0)
+
+
+def test_breaker_opens_after_consecutive_5xx(server):
+    server.error_rate = 1.0
+
+    async def scenario():
+        for text in TRIGGERS[:3]:
+            assert await database.get_response_from_db(text) is None
+        requests_before = server.stats["requests"]
+        assert resilience.breaker.state == CircuitBreaker.OPEN
+        # Breaker terbuka: panggilan berikutnya tidak sampai ke backend.
+        assert await database.get_response_from_db(TRIGGERS[0]) is None
+        assert server.stats["requests"] == requests_before
+
+    asyncio.run(scenario())
+
+
+def test_half_open_allows_a_single_probe(server):
+    async def scenario():
+        server.error_rate = 1.0
+        for text in TRIGGERS[:3]:
+            await database.get_response_from_db(text)
+        assert resilience.breaker.state == CircuitBreaker.OPEN
+
+        server.error_rate = 0.0
+        server.latency = 0.1
+        await asyncio.sleep(0.25)
+        operation = database.supabase.table('learned_triggers').select('*').limit(1).execute
+        results = await asyncio.gather(
+            resilience.run_db_operation('probe', operation),
+            resilience.run_db_operation('probe', operation),
+            return_exceptions=True,
+        )
+        assert sum(isinstance(result, CircuitOpenError) for result in results) == 1
+        assert resilience.breaker.state == CircuitBreaker.CLOSED
+
+    asyncio.run(scenario())
+
+
+def test_failed_probe_reopens_circuit(server):
+    async def scenario():
+        server.error_rate = 1.0
+        for text in TRIGGERS[:3]:
+            await database.get_response_from_db(text)
+        await asyncio.sleep(0.25)
+        await database.get_response_from_db(TRIGGERS[0])
+        assert resilience.breaker.state == CircuitBreaker.OPEN
+
+    asyncio.run(scenario())
+
+
+def test_hung_backend_hits_deadline(server, monkeypatch):
+    monkeypatch.setattr(database, "DB_READ_TIMEOUT_SECONDS", 0.2)
+    server.latency = 5.0
+
+    async def scenario():
+        started = time.monotonic()
+        result = await database.get_response_from_db(TRIGGERS[0])
+        return result, time.monotonic() - started
+
+    result, elapsed = asyncio.run(scenario())
+    assert result is None
+    assert elapsed < 0.5
+    assert resilience.breaker.failures == 1
+
+
+def test_fallback_serves_cached_response(server, monkeypatch):
+    monkeypatch.setattr(database, "DB_READ_TIMEOUT_SECONDS", 0.2)
+    expected = {"response_type": "text", "response_content": f"reply {TRIGGERS[1]}"}
+
+    async def scenario():
+        assert await database.get_response_from_db(TRIGGERS[1]) == expected
+        server.error_rate = 1.0
+        assert await database.get_response_from_db(TRIGGERS[1]) == expected
+        server.error_rate = 0.0
+        server.latency = 5.0
+        assert await database.get_response_from_db(TRIGGERS[1]) == expected
+
+    asyncio.run(scenario())
+
+
+def test_hedged_read_returns_first_success(monkeypatch):
+    monkeypatch.setattr(resilience, "DB_HEDGE_READS", True)
+    monkeypatch.setattr(resilience, "DB_HEDGE_MIN_DELAY_SECONDS", 0.05)
+    calls = []
+    lock = threading.Lock()
+
+    def operation():
+        with lock:
+            calls.append(None)
+            attempt = len(calls)
+        if attempt == 1:
+            time.sleep(0.5)  # request pertama "nyangkut"
+            return "primary"
+        return "hedge"
+
+    async def scenario():
+        started = time.monotonic()
+        result = await resilience.run_db_operation('hedged', operation, timeout=2.0, hedge=True)
+        return result, time.monotonic() - started
+
+    result, elapsed = asyncio.run(scenario())
+    assert result == "hedge"
+    assert elapsed < 0.4
+    assert len(calls) == 2
+
+
+@pytest.mark.parametrize("error", [TypeError("bad argument"), KeyError("response_content")])
+def test_bugs_in_query_code_do_not_trip_breaker(error):
+    def operation():
+        raise error
+
+    async def scenario():
+        for _ in range(5):
+            with pytest.raises(type(error)):
+                await resilience.run_db_operation('buggy', operation)
+
+    asyncio.run(scenario())
+    assert resilience.breaker.state == CircuitBreaker.CLOSED
+    assert resilience.breaker.failures == 0
+
+
+def test_server_fault_classification():
+    import httpx
+    from postgrest.exceptions import APIError
+
+    assert resilience.is_server_fault(asyncio.TimeoutError())
+    assert resilience.is_server_fault(httpx.ConnectError("refused"))
+    assert resilience.is_server_fault(APIError({"message": "unavailable", "code": 503}))
+    assert resilience.is_server_fault(APIError({"message": "schema cache", "code": "PGRST002"}))
+    assert not resilience.is_server_fault(APIError({"message": "duplicate", "code": "23505"}))
+    assert not resilience.is_server_fault(ValueError("bug"))
+
+
+def test_latency_p95_is_nearest_rank():
+    tracker = resilience.LatencyTracker(min_samples=20)
+    for ms in range(1, 31):
+        tracker.observe(ms / 1000)
+    assert tracker.p95() == 0.029  # ceil(0.95 * 30) = sampel ke-29, bukan ke-28
+    assert resilience.LatencyTracker().p95() is None
@@ -0,0 +1,55 @@
+"""Uji profil runtime (utils/runtime_profile.py): orjson/uvloop dan fallback ke stdlib."""
+import json
+import sys
+
+import pytest
+
+from utils import runtime_profile
+
+
+def test_orjson_dumps_returns_str_like_json():
+    pytest.importorskip("orjson")
+    loads, dumps = runtime_profile._orjson_codec()
+    value = {"chat_id": -100, "text": "halo ✓", 5: [1.5, None, True]}
+    encoded = dumps(value)
+    assert isinstance(encoded, str)  # aiogram memakai hasil json_dumps sebagai str
+    assert loads(encoded) == json.loads(json.dumps(value))
+
+
+def test_fast_profile_falls_back_to_stdlib_when_not_installed(monkeypatch):
+    # None di sys.modules membuat `import` melempar ImportError, seperti paket yang tidak terpasang.
+    monkeypatch.setitem(sys.modules, "uvloop", None)
+    monkeypatch.setitem(sys.modules, "orjson", None)
+    profile = runtime_profile.resolve("fast")
+
+    assert profile.missing == ("uvloop", "orjson")
+    assert (profile.loop_name, profile.json_name) == ("asyncio", "json")
+    assert profile.session_kwargs() == {}
+
+    async def main():
+        return runtime_profile.active_loop_name()
+
+    assert profile.run(main()) == "asyncio"
+
+
+def test_fast_profile_runs_on_uvloop_when_installed():
+    pytest.importorskip("uvloop")
+
+    async def main():
+        return runtime_profile.active_loop_name()
+
+    assert runtime_profile.resolve("fast").run(main()) == "uvloop"
+
+
+def test_standard_profile_runs_asyncio_after_aiogram_import():
+    import aiogram  # noqa: F401 - memasang policy uvloop bila uvloop terpasang
+
+    async def main():
+        return runtime_profile.active_loop_name()
+
+    assert runtime_profile.resolve("standard").run(main()) == "asyncio"
+
+
+def test_unknown_profile_uses_standard():
+    profile = runtime_profile.resolve("turbo")
+    assert profile.name == "standard" and profile.loop_factory is None and profile.missing == ()
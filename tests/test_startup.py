@@ -0,0 +1,100 @@
+"""Uji retry warm-up (utils/startup.py) dan refresh trigger store (utils/trigger_manager.py)."""
+import asyncio
+
+import pytest
+
+from utils import admin_manager, database, startup, trigger_manager
+
+
+@pytest.fixture
+def server(fake_supabase, monkeypatch):
+    monkeypatch.setattr(trigger_manager, "trigger_store", None)
+    return fake_supabase(triggers=[
+        {"trigger_text": f"trigger {i}", "response_type": "text", "response_content": f"reply {i}", "creator_id": 1}
+        for i in range(10)
+    ], timeout=1.0)
+
+
+def test_keep_warming_retries_only_failed_steps(server, monkeypatch):
+    calls = []
+
+    def counted(name, factory):
+        async def step():
+            calls.append(name)
+            return await factory()
+        return step
+
+    steps = startup._warmup_steps
+    monkeypatch.setattr(startup, "_warmup_steps", lambda bot: {
+        name: counted(name, factory) for name, factory in steps(bot).items()})
+
+    async def scenario():
+        results = {"supabase_client": True, "admin_cache": True, "trigger_index": False,
+                   "bot_profile": True, "locales": True}
+        await startup.keep_warming(bot=None, results=results, interval=0)
+        return results
+
+    results = asyncio.run(scenario())
+    assert calls == ["trigger_index"]
+    assert all(results.values())
+    assert trigger_manager.trigger_store.get("trigger 3") is not None
+
+
+def test_refresh_picks_up_external_changes(server):
+    async def scenario():
+        assert await trigger_manager.load_trigger_index()
+        assert trigger_manager.trigger_store.get("external") is None
+        # Trigger ditambah dari luar proses ini (worker lain / dashboard).
+        server.seed_rows("learned_triggers", [
+            {"trigger_text": "external", "response_type": "text", "response_content": "hi", "creator_id": 2}])
+        task = trigger_manager.start_refresher(interval=0.05)
+        try:
+            for _ in range(100):
+                if trigger_manager.trigger_store.get("external") is not None:
+                    return True
+                await asyncio.sleep(0.02)
+            return False
+        finally:
+            task.cancel()
+
+    assert asyncio.run(scenario())
+
+
+def test_local_changes_during_reload_are_kept(server, monkeypatch):
+    original = database.get_trigger_responses_page_from_db
+
+    async def slow_fetch(after_id, limit=database.TRIGGER_PAGE_SIZE):
+        rows = await original(after_id, limit)
+        await asyncio.sleep(0.1)  # trigger baru masuk setelah halaman dibaca
+        return rows
+
+    monkeypatch.setattr(database, "get_trigger_responses_page_from_db", slow_fetch)
+
+    async def scenario():
+        reload = asyncio.create_task(trigger_manager.load_trigger_index())
+        await asyncio.sleep(0.05)
+        assert await trigger_manager.add_trigger("added meanwhile", "text", "fresh", 1) is True
+        assert await trigger_manager.delete_trigger("trigger 0")
+        assert await reload
+
+    asyncio.run(scenario())
+    assert trigger_manager.trigger_store.get("added meanwhile").response_content == "fresh"
+    assert trigger_manager.trigger_store.get("trigger 0") is None
+
+
+def test_admin_cache_step_fails_while_db_is_down(server, monkeypatch):
+    server.seed_rows("bot_admins", [{"user_id": 77, "added_by": 1}])
+    monkeypatch.setattr(admin_manager, "admin_ids_cache", set())
+    server.error_rate = 1.0
+
+    async def scenario():
+        failed = await startup.warm_up(bot=None, only=["admin_cache"])
+        server.error_rate = 0.0
+        results = dict(failed)
+        await startup.keep_warming(bot=None, results=results, interval=0)
+        return failed, results
+
+    failed, results = asyncio.run(scenario())
+    assert failed == {"admin_cache": False}
+    assert results == {"admin_cache": True}
+    assert 77 in admin_manager.admin_ids_cache
@@ -0,0 +1,139 @@
+"""Uji TriggerStore (utils/trigger_store.py) serta pemuatan per halaman dan snapshot bersama di utils/trigger_manager.py."""
+import asyncio
+import multiprocessing
+import os
+import time
+from collections import deque
+
+import pytest
+
+from utils import database, trigger_manager
+from utils.trigger_store import TriggerStore, TriggerStoreBuilder
+
+
+def _rows(count: int, tag: str = "") -> list:
+    types = ("text", "photo", "animation", "sticker")
+    return [{"trigger_text": f"trigger {i:04d}", "response_type": types[i % 4],
+             "response_content": f"reply {i}{tag}" if i % 4 == 0 else f"FILE_{i % 7}{tag}"} for i in range(count)]
+
+
+def test_builder_pages_match_single_build():
+    rows = _rows(200)
+    builder = TriggerStoreBuilder()
+    for start in range(0, len(rows), 30):
+        builder.add_rows(rows[start:start + 30])
+    # Baris dengan trigger yang sama muncul lagi di halaman berikutnya: yang terakhir menang.
+    builder.add_rows([{"trigger_text": "trigger 0005", "response_type": "text", "response_content": "updated"}])
+    store = builder.build()
+
+    assert len(store) == 200
+    assert store.get("trigger 0005").response_content == "updated"
+    assert store.get("trigger 0006").as_response() == {"response_type": "animation", "response_content": "FILE_6"}
+    assert [record.trigger_text for record in store] == sorted(row["trigger_text"] for row in rows)
+
+
+def _save_repeatedly(path: str, tag: str, rounds: int):
+    store = TriggerStore.build(_rows(2000 if tag == "a" else 1500, tag))
+    for _ in range(rounds):
+        store.save(path)
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="butuh fork")
+def test_concurrent_saves_never_publish_a_mixed_snapshot(tmp_path):
+    path = str(tmp_path / "triggers.snap")
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=_save_repeatedly, args=(path, tag, 30)) for tag in ("a", "b")]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(60)
+        assert worker.exitcode == 0
+
+    store = TriggerStore.open(path)
+    tag = "a" if len(store) == 2000 else "b"
+    expected = TriggerStore.build(_rows(len(store), tag))
+    assert [record.as_response() for record in store] == [record.as_response() for record in expected]
+    store.close()
+    assert os.listdir(tmp_path) == ["triggers.snap"]
+
+
+def test_load_trigger_index_pages_by_id(fake_supabase, monkeypatch):
+    monkeypatch.setattr(database, "TRIGGER_PAGE_SIZE", 7)
+    monkeypatch.setattr(trigger_manager, "trigger_store", None)
+    server = fake_supabase(triggers=_rows(50))
+    assert asyncio.run(trigger_manager.load_trigger_index())
+
+    assert len(trigger_manager.trigger_store) == 50
+    assert server.stats["requests"] == 8  # 7 halaman penuh + 1 halaman sisa
+
+
+@pytest.fixture
+def shared_snapshot(tmp_path, monkeypatch):
+    path = str(tmp_path / "triggers.snap")
+    monkeypatch.setattr(trigger_manager, "TRIGGER_SNAPSHOT_PATH", path)
+    monkeypatch.setattr(trigger_manager, "TRIGGER_SNAPSHOT_MAX_AGE_SECONDS", 60)
+    monkeypatch.setattr(trigger_manager, "trigger_store", None)
+    monkeypatch.setattr(trigger_manager, "_store_generation", 0.0)
+    monkeypatch.setattr(trigger_manager, "_local_changes", deque())
+    return path
+
+
+def _load_in_worker(server, results):
+    database.supabase = server.make_client(timeout=5.0)
+    ok = asyncio.run(trigger_manager.load_trigger_index())
+    results.put((ok, os.stat(trigger_manager.TRIGGER_SNAPSHOT_PATH).st_ino, len(trigger_manager.trigger_store)))
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="butuh fork")
+def test_workers_share_one_snapshot_file(fake_supabase, shared_snapshot):
+    server = fake_supabase(triggers=_rows(50))
+    context = multiprocessing.get_context("fork")
+    results = context.Queue()
+    workers = [context.Process(target=_load_in_worker, args=(server, results)) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    loaded = [results.get(timeout=60) for _ in workers]
+    for worker in workers:
+        worker.join(60)
+
+    # Satu worker membangun snapshot dari DB; tiga lainnya memetakan file (inode) yang sama.
+    assert server.stats["requests"] == 1
+    assert len({inode for _, inode, _ in loaded}) == 1
+    assert loaded[0][0] and all(result[1:] == loaded[0][1:] for result in loaded)
+    assert loaded[0][2] == 50
+
+
+def test_stale_snapshot_is_rebuilt_from_db(fake_supabase, shared_snapshot, monkeypatch):
+    server = fake_supabase(triggers=_rows(50))
+    assert asyncio.run(trigger_manager.load_trigger_index())
+    assert trigger_manager.trigger_store.memory_usage()["mapped"]
+    monkeypatch.setattr(trigger_manager, "_store_generation", 0.0)  # seperti worker yang baru start
+    assert asyncio.run(trigger_manager.load_trigger_index())
+    assert server.stats["requests"] == 1
+
+    monkeypatch.setattr(trigger_manager, "TRIGGER_SNAPSHOT_MAX_AGE_SECONDS", 0)
+    assert asyncio.run(trigger_manager.load_trigger_index())
+    assert server.stats["requests"] == 2
+
+
+def test_local_change_survives_older_shared_snapshot(fake_supabase, shared_snapshot):
+    fake_supabase(triggers=_rows(20))
+
+    async def scenario():
+        assert await trigger_manager.load_trigger_index()
+        await asyncio.sleep(0.02)
+        # Worker lain mengambil data dari DB sebelum trigger baru ditambahkan di sini...
+        fetched_at = time.time()
+        await asyncio.sleep(0.02)
+        assert await trigger_manager.add_trigger("mine", "text", "local", 1) is True
+        assert await trigger_manager.delete_trigger("trigger 0003")
+        # ...lalu menerbitkan snapshot-nya setelahnya.
+        TriggerStore.build(_rows(20)).save(shared_snapshot, mtime=fetched_at)
+        assert await trigger_manager.load_trigger_index()
+
+    asyncio.run(scenario())
+    store = trigger_manager.trigger_store
+    assert store.memory_usage()["mapped"]
+    assert store.get("mine").response_content == "local"
+    assert store.get("trigger 0003") is None
+    assert len(store) == 20
@@ -1,13 +1,17 @@
 import logging
 from . import database 
+from .logging_setup import log_sampled
 from config import SUPER_ADMIN_ID
 
 admin_ids_cache = set()
 
 async def load_admins_to_cache():
-    """Memuat semua admin dari DB ke cache, termasuk SUPER_ADMIN_ID."""
+    """Memuat semua admin dari DB ke cache, termasuk SUPER_ADMIN_ID. False jika DB gagal (cache lama dipertahankan)."""
     global admin_ids_cache
     db_admin_records = await database.get_all_admins_from_db() 
+    if db_admin_records is None:
+        log_sampled(logging.WARNING, "admin_cache_load_failed", "Admin cache not loaded: DB unavailable; keeping %d cached admins.", len(admin_ids_cache))
+        return False
     current_admins = {record['user_id'] for record in db_admin_records}
 
     if SUPER_ADMIN_ID:
@@ -15,13 +19,15 @@ async def load_admins_to_cache():
         
 
     admin_ids_cache = current_admins
-    logging.info(f"Admin cache loaded: {admin_ids_cache}")
+    logging.info("Admin cache loaded: %d admins.", len(admin_ids_cache))
+    if logging.getLogger().isEnabledFor(logging.DEBUG):
+        logging.debug("Admin cache contents: %s", sorted(admin_ids_cache))
     return True 
 
 async def is_user_admin(user_id: int) -> bool:
     """Memeriksa apakah user_id adalah admin (dari cache atau SUPER_ADMIN_ID)."""
     if not admin_ids_cache and SUPER_ADMIN_ID is not None: 
-        logging.info("Admin cache is empty, attempting to load...")
+        log_sampled(logging.INFO, "admin_cache_empty", "Admin cache is empty, attempting to load...")
         await load_admins_to_cache()
         
 
@@ -0,0 +1,131 @@
+import asyncio
+import json
+import logging
+from datetime import datetime, timezone
+from config import AUDIT_BATCH_SIZE, AUDIT_FLUSH_SECONDS, AUDIT_SHUTDOWN_TIMEOUT_SECONDS
+from . import database
+
+# Event audit dicatat tanpa menunggu DB: record() hanya memasukkan ke antrean, writer menulis
+# per batch. Event yang gagal ditulis tetap di _buffer dan dicoba lagi pada siklus berikutnya.
+_queue = asyncio.Queue()
+_buffer = []
+_STOP = object()
+MAX_CONTENT_LENGTH = 200
+# Aksi yang response_content-nya disimpan utuh: isi trigger yang dihapus hanya tersisa di audit log.
+FULL_CONTENT_ACTIONS = {"trigger.delete"}
+
+
+def record(actor_id: int, action: str, target, success: bool = True, **details) -> None:
+    """Mencatat satu aksi admin, misalnya record(admin_id, "trigger.delete", "halo", response_type="text")."""
+    event = {
+        'actor_id': actor_id,
+        'action': action,
+        'target': str(target),
+        'details': {key: value for key, value in details.items() if value is not None},
+        'success': bool(success),
+        'created_at': datetime.now(timezone.utc).isoformat(),
+    }
+    content = event['details'].get('response_content')
+    if action not in FULL_CONTENT_ACTIONS and isinstance(content, str) and len(content) > MAX_CONTENT_LENGTH:
+        event['details']['response_content'] = content[:MAX_CONTENT_LENGTH] + "…"
+    _queue.put_nowait(event)
+
+
+def pending_count() -> int:
+    return _queue.qsize() + len(_buffer)
+
+
+async def _write_buffer() -> bool:
+    while _buffer:
+        batch = _buffer[:AUDIT_BATCH_SIZE]
+        if not await database.insert_audit_events_to_db(batch):
+            logging.warning("Audit log write failed; %d events kept for retry.", len(_buffer))
+            return False
+        del _buffer[:len(batch)]
+    return True
+
+
+async def _writer():
+    loop = asyncio.get_running_loop()
+    stopping = False
+    while not stopping:
+        # Kalau masih ada event yang gagal ditulis, bangun lagi setelah AUDIT_FLUSH_SECONDS untuk retry.
+        try:
+            item = await (asyncio.wait_for(_queue.get(), AUDIT_FLUSH_SECONDS) if _buffer else _queue.get())
+        except asyncio.TimeoutError:
+            item = None
+        if item is _STOP:
+            stopping = True
+        elif item is not None:
+            _buffer.append(item)
+
+        # Kumpulkan event berikutnya sampai batch penuh atau jendela flush habis.
+        deadline = loop.time() + AUDIT_FLUSH_SECONDS
+        while not stopping and len(_buffer) < AUDIT_BATCH_SIZE:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(_queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            if item is _STOP:
+                stopping = True
+            else:
+                _buffer.append(item)
+
+        if stopping:
+            _drain_queue()
+        await _write_buffer()
+
+
+def _drain_queue():
+    while not _queue.empty():
+        item = _queue.get_nowait()
+        if item is not _STOP:
+            _buffer.append(item)
+
+
+def _log_unwritten():
+    """Pilihan terakhir saat shutdown: event yang tidak bisa ditulis ke DB tetap tercatat di log."""
+    _drain_queue()
+    for event in _buffer:
+        logging.error("[AUDIT_UNWRITTEN] %s", json.dumps(event, ensure_ascii=False))
+    _buffer.clear()
+
+
+def start_writer() -> asyncio.Task:
+    global _queue
+    # asyncio.Queue terikat ke event loop pertama yang memakainya; antrean dibuat ulang untuk loop ini
+    # (mis. bot dijalankan ulang dalam proses yang sama) dan event yang sudah tercatat dipindahkan.
+    pending = []
+    while not _queue.empty():
+        pending.append(_queue.get_nowait())
+    _queue = asyncio.Queue()
+    for event in pending:
+        _queue.put_nowait(event)
+    return asyncio.create_task(_writer())
+
+
+async def stop_writer(task: asyncio.Task, timeout: float = AUDIT_SHUTDOWN_TIMEOUT_SECONDS):
+    """Menulis semua event yang tersisa lalu menghentikan writer (dipanggil saat shutdown)."""
+    _queue.put_nowait(_STOP)
+    try:
+        await asyncio.wait_for(task, timeout)
+    except asyncio.TimeoutError:
+        logging.error(f"Audit log flush did not finish within {timeout}s.")
+    except Exception as e:
+        logging.error(f"Audit log writer failed during shutdown: {e}", exc_info=True)
+    if pending_count():
+        _log_unwritten()
+    else:
+        logging.info("Audit log flushed.")
+
+
+async def get_page(before_id, limit: int):
+    """Satu halaman event (terbaru dulu) dan cursor halaman berikutnya, atau (None, None) jika DB gagal."""
+    events = await database.get_audit_events_page_from_db(before_id, limit + 1)
+    if events is None:
+        return None, None
+    next_cursor = events[limit - 1]['id'] if len(events) > limit else None
+    return events[:limit], next_cursor
@@ -0,0 +1,189 @@
+import asyncio
+import logging
+import time
+from aiogram.exceptions import TelegramForbiddenError, TelegramBadRequest, TelegramRetryAfter, TelegramMigrateToChat
+from config import BROADCAST_WORKERS, BROADCAST_RATE_PER_SECOND, BROADCAST_PAGE_SIZE, BROADCAST_PROGRESS_SECONDS
+from . import chat_registry
+
+# Pesan TelegramBadRequest yang berarti chat sudah tidak bisa dikirimi lagi.
+_DEAD_CHAT_ERRORS = ("chat not found", "bot was kicked", "bot is not a member", "user is deactivated",
+                     "have no rights to send")
+MAX_RETRY_AFTER_ATTEMPTS = 3
+
+
+class RateLimiter:
+    """Token bucket sederhana: rata-rata `rate` izin per detik, dibagi ke semua worker."""
+
+    def __init__(self, rate: float):
+        self.interval = 1 / rate if rate > 0 else 0.0
+        self._next_slot = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        if not self.interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            wait = self._next_slot - now
+            self._next_slot = max(self._next_slot, now) + self.interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def pause(self, seconds: float):
+        """Dipanggil saat Telegram membalas RetryAfter (flood control): semua worker ikut menunggu."""
+        self._next_slot = max(self._next_slot, time.monotonic() + seconds)
+
+
+class Broadcast:
+    """Mengirim satu pesan ke semua chat di registry.
+
+    Producer mengalirkan halaman chat_id ke antrean terbatas, sejumlah worker mengirim
+    lewat RateLimiter bersama. Chat yang memblokir / mengeluarkan bot dikumpulkan lalu
+    dihapus dari registry di akhir.
+    """
+
+    def __init__(self, send, workers: int = BROADCAST_WORKERS, rate: float = BROADCAST_RATE_PER_SECOND,
+                 page_size: int = BROADCAST_PAGE_SIZE):
+        self.send = send  # async callable(chat_id)
+        self.workers = max(1, workers)
+        self.limiter = RateLimiter(rate)
+        self.page_size = page_size
+        self.total = None
+        self.queued = 0
+        self.sent = 0
+        self.failed = 0
+        self.pruned = []
+        self.started = None
+        self.finished = None
+        self.cancelled = False
+
+    @property
+    def processed(self) -> int:
+        return self.sent + self.failed + len(self.pruned)
+
+    @property
+    def elapsed(self) -> float:
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.monotonic()) - self.started
+
+    @property
+    def rate(self) -> float:
+        return self.sent / self.elapsed if self.elapsed else 0.0
+
+    async def _deliver(self, chat_id: int):
+        for _ in range(MAX_RETRY_AFTER_ATTEMPTS):
+            await self.limiter.acquire()
+            try:
+                await self.send(chat_id)
+                self.sent += 1
+                return
+            except TelegramRetryAfter as e:
+                logging.warning(f"Broadcast hit flood control, pausing {e.retry_after}s.")
+                self.limiter.pause(e.retry_after)
+            except TelegramMigrateToChat as e:
+                # Grup di-upgrade ke supergroup: id lama dibuang, id baru akan tercatat saat ada pesan lagi.
+                logging.info(f"Broadcast: chat {chat_id} migrated to {e.migrate_to_chat_id}.")
+                self.pruned.append(chat_id)
+                return
+            except TelegramForbiddenError:
+                self.pruned.append(chat_id)
+                return
+            except TelegramBadRequest as e:
+                if any(error in e.message.lower() for error in _DEAD_CHAT_ERRORS):
+                    self.pruned.append(chat_id)
+                else:
+                    logging.warning(f"Broadcast to {chat_id} failed: {e.message}")
+                    self.failed += 1
+                return
+            except Exception as e:
+                logging.warning(f"Broadcast to {chat_id} failed: {type(e).__name__} {e}")
+                self.failed += 1
+                return
+        self.failed += 1
+
+    async def _worker(self, queue: asyncio.Queue):
+        while True:
+            chat_id = await queue.get()
+            try:
+                if chat_id is None:
+                    return
+                await self._deliver(chat_id)
+            finally:
+                queue.task_done()
+
+    async def run(self, on_progress=None):
+        """Menjalankan broadcast sampai selesai. `on_progress(self)` dipanggil berkala dan di akhir."""
+        # Chat tertunda di-flush dulu supaya ikut terhitung di total.
+        await chat_registry.flush()
+        self.total = await chat_registry.count_chats()
+        self.started = time.monotonic()
+        queue = asyncio.Queue(maxsize=self.workers * 4)
+        workers = [asyncio.create_task(self._worker(queue)) for _ in range(self.workers)]
+        reporter = asyncio.create_task(self._report(on_progress)) if on_progress else None
+        try:
+            async for page in chat_registry.iter_chat_pages(self.page_size):
+                # Chat baru yang ter-flush di tengah broadcast bisa ikut terkirim; total menyesuaikan.
+                self.queued += len(page)
+                self.total = max(self.total or 0, self.queued)
+                for chat_id in page:
+                    await queue.put(chat_id)
+            for _ in workers:
+                await queue.put(None)
+            await asyncio.gather(*workers)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        finally:
+            for worker in workers:
+                worker.cancel()
+            if reporter:
+                reporter.cancel()
+            self.finished = time.monotonic()
+            if self.pruned:
+                await chat_registry.forget_chats(self.pruned)
+            logging.info(f"Broadcast finished: sent={self.sent} failed={self.failed} pruned={len(self.pruned)} "
+                         f"in {self.elapsed:.1f}s ({self.rate:.1f} msg/s).")
+        if on_progress:
+            await on_progress(self)
+
+    async def _report(self, on_progress):
+        while True:
+            await asyncio.sleep(BROADCAST_PROGRESS_SECONDS)
+            try:
+                await on_progress(self)
+            except Exception as e:
+                logging.debug("Broadcast progress update failed: %s", e)
+
+
+# Hanya satu broadcast dalam satu waktu supaya batas rate Bot API tidak terbagi dua. Slot dipesan
+# tanpa await (claim_broadcast), jadi dua /broadcast yang datang bersamaan tidak bisa sama-sama lolos.
+_active = None
+
+
+def broadcast_in_progress() -> bool:
+    return _active is not None
+
+
+def claim_broadcast(send):
+    """Memesan slot broadcast. Mengembalikan Broadcast baru, atau None jika sudah ada yang berjalan."""
+    global _active
+    if _active is not None:
+        return None
+    _active = Broadcast(send)
+    return _active
+
+
+def release_broadcast(broadcast: Broadcast):
+    global _active
+    if _active is broadcast:
+        _active = None
+
+
+async def run_broadcast(broadcast: Broadcast, on_progress=None) -> Broadcast:
+    """Menjalankan broadcast hasil claim_broadcast() lalu melepas slotnya."""
+    try:
+        await broadcast.run(on_progress)
+    finally:
+        release_broadcast(broadcast)
+    return broadcast
@@ -0,0 +1,102 @@
+import asyncio
+import logging
+from datetime import datetime, timezone
+from config import CHAT_REGISTRY_FLUSH_SECONDS, CHAT_REGISTRY_BATCH_SIZE
+from . import database
+
+# Chat yang sudah terlihat di proses ini. Pesan dari chat yang sudah dikenal tidak menimbulkan
+# tulisan apa pun; chat baru dikumpulkan di _pending dan di-upsert per batch oleh flusher.
+known_chat_ids = set()
+_pending = {}  # chat_id -> baris bot_chats
+
+
+def track_chat(chat) -> None:
+    if chat.id in known_chat_ids:
+        return
+    known_chat_ids.add(chat.id)
+    _pending[chat.id] = {
+        'chat_id': chat.id,
+        'chat_type': chat.type,
+        'title': chat.title or chat.full_name or "",
+        'last_seen_at': datetime.now(timezone.utc).isoformat(),
+    }
+
+
+def pending_count() -> int:
+    return len(_pending)
+
+
+async def flush() -> bool:
+    """Menulis chat yang tertunda ke DB. Batch yang gagal dikembalikan ke antrean untuk dicoba lagi."""
+    global _pending
+    if not _pending:
+        return True
+    rows, _pending = list(_pending.values()), {}
+    for start in range(0, len(rows), CHAT_REGISTRY_BATCH_SIZE):
+        batch = rows[start:start + CHAT_REGISTRY_BATCH_SIZE]
+        if not await database.upsert_chats_to_db(batch):
+            for row in rows[start:]:
+                _pending.setdefault(row['chat_id'], row)
+            logging.warning("Chat registry flush failed; %d chats kept for retry.", len(_pending))
+            return False
+    logging.debug("Chat registry flushed %d chats.", len(rows))
+    return True
+
+
+async def _flush_periodically(interval: float):
+    while True:
+        await asyncio.sleep(interval)
+        await flush()
+
+
+def start_flusher(interval: float = CHAT_REGISTRY_FLUSH_SECONDS) -> asyncio.Task:
+    return asyncio.create_task(_flush_periodically(interval))
+
+
+async def stop_flusher(task: asyncio.Task):
+    """Menghentikan flusher lalu menulis sisa chat yang tertunda (dipanggil saat shutdown)."""
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+    await flush()
+
+
+async def forget_chats(chat_ids: list) -> bool:
+    """Menghapus chat (bot diblokir / dikeluarkan) dari registry memori dan DB."""
+    for chat_id in chat_ids:
+        known_chat_ids.discard(chat_id)
+        _pending.pop(chat_id, None)
+    return await database.delete_chats_from_db(chat_ids)
+
+
+async def count_chats():
+    count = await database.count_chats_in_db()
+    return count if count is not None else len(known_chat_ids)
+
+
+async def iter_chat_pages(page_size: int):
+    """Mengalirkan chat_id dari DB per halaman (keyset), tanpa memuat seluruh registry sekaligus.
+
+    Chat yang tertunda di-flush dulu supaya ikut terkirim. Jika DB tidak bisa dihubungi
+    sejak halaman pertama, yang dikirim adalah chat yang dikenal proses ini.
+    """
+    await flush()
+    after = None
+    while True:
+        page = await database.get_chat_ids_page_from_db(after, page_size)
+        if page is None:
+            if after is None:
+                logging.warning("Chat registry unavailable in DB; streaming %d in-memory chats.", len(known_chat_ids))
+                snapshot = sorted(known_chat_ids)
+                for start in range(0, len(snapshot), page_size):
+                    yield snapshot[start:start + page_size]
+            else:
+                logging.error(f"Chat registry page after {after} could not be fetched; stopping stream.")
+            return
+        if page:
+            yield page
+        if len(page) < page_size:
+            return
+        after = page[-1]
@@ -1,16 +1,55 @@
 import logging
 import asyncio
-from supabase import create_client, Client
-from postgrest.exceptions import APIError 
-from config import SUPABASE_URL, SUPABASE_KEY 
+from collections import OrderedDict
+from config import SUPABASE_URL, SUPABASE_KEY, DB_TIMEOUT_SECONDS, DB_READ_TIMEOUT_SECONDS
+from .resilience import run_db_operation, CircuitOpenError
+from .logging_setup import log_sampled
 
-supabase: Client = None
+# supabase/postgrest (beserta gotrue, realtime, storage3, httpx) baru diimpor saat
+# init_supabase_client() dipanggil di startup, bukan saat modul ini diimpor.
+supabase = None
+
+
+class _APIErrorPlaceholder(Exception):
+    """Pengganti postgrest APIError sebelum postgrest diimpor; tidak pernah dilempar."""
+
+
+APIError = _APIErrorPlaceholder
+
+# Cache "last known good" untuk operasi baca. Dipakai sebagai fallback saat circuit breaker
+# terbuka atau query timeout, supaya handler tidak ikut menggantung.
+RESPONSE_CACHE_SIZE = 2048
+_MISSING = object()
+_response_cache = OrderedDict()
+
+def _remember_response(trigger_text_lower: str, value):
+    _response_cache[trigger_text_lower] = value
+    _response_cache.move_to_end(trigger_text_lower)
+    if len(_response_cache) > RESPONSE_CACHE_SIZE:
+        _response_cache.popitem(last=False)
+
+def _load_postgrest_errors():
+    global APIError
+    from postgrest.exceptions import APIError as PostgrestAPIError
+    APIError = PostgrestAPIError
+
+def set_client(client):
+    """Memakai klien supabase yang sudah dibuat (mis. untuk server palsu di benchmarks/)."""
+    global supabase
+    _load_postgrest_errors()
+    supabase = client
 
 def init_supabase_client():
     global supabase
     if SUPABASE_URL and SUPABASE_KEY:
         try:
-            supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+            from supabase import create_client
+            from supabase.lib.client_options import ClientOptions
+            _load_postgrest_errors()
+            # Timeout di level HTTP juga, supaya thread executor tidak tertahan selamanya
+            # walaupun asyncio.wait_for sudah melepas handler-nya.
+            options = ClientOptions(postgrest_client_timeout=DB_TIMEOUT_SECONDS)
+            supabase = create_client(SUPABASE_URL, SUPABASE_KEY, options=options)
             logging.info("Supabase client initialized successfully.")
         except Exception as e:
             logging.error(f"Failed to initialize Supabase client: {e}", exc_info=True)
@@ -18,6 +57,7 @@ def init_supabase_client():
     else:
         logging.error("Supabase URL or Key not found in .env file. Database functionality will be disabled.")
         supabase = None
+    return supabase is not None
 
 async def add_trigger_to_db(trigger_text: str, response_type: str, response_content: str, creator_id: int):
     if not supabase:
@@ -35,11 +75,12 @@ async def add_trigger_to_db(trigger_text: str, response_type: str, response_cont
     }).execute()
 
     try:
-        response = await asyncio.to_thread(db_operation)
+        response = await run_db_operation('add_trigger', db_operation)
         logging.info(f"[DB_OP_RESULT] Insert for '{trigger_text_lower}': data_count={len(response.data) if response.data else 0}")
 
         if response.data and len(response.data) > 0:
             logging.info(f"Trigger '{trigger_text_lower}' added successfully to DB.")
+            _response_cache.pop(trigger_text_lower, None)
             return response.data[0]
         logging.warning(f"No data returned after insert for '{trigger_text_lower}', though no APIError was raised.")
         return None 
@@ -49,6 +90,9 @@ async def add_trigger_to_db(trigger_text: str, response_type: str, response_cont
             logging.warning(f"Trigger '{trigger_text_lower}' already exists in DB (unique violation).")
             return "exists"
         return None
+    except (CircuitOpenError, asyncio.TimeoutError) as e:
+        logging.error(f"[DB_UNAVAILABLE] During add_trigger_to_db for '{trigger_text_lower}': {type(e).__name__} {e}")
+        return None
     except Exception as e:
         logging.error(f"[DB_EXCEPTION] During add_trigger_to_db for '{trigger_text_lower}': {e}", exc_info=True)
         return None
@@ -58,66 +102,109 @@ async def get_response_from_db(trigger_text: str):
         logging.error("Supabase client not initialized. Cannot get response.")
         return None
     trigger_text_lower = trigger_text.lower()
-    logging.info(f"[DB_OP] Attempting to fetch response for trigger: {trigger_text_lower}")
+    logging.debug("[DB_OP] Attempting to fetch response for trigger: %s", trigger_text_lower)
     db_operation = lambda: supabase.table('learned_triggers') \
         .select('response_type, response_content') \
         .eq('trigger_text', trigger_text_lower) \
         .limit(1) \
         .execute()
     try:
-        response = await asyncio.to_thread(db_operation)
-        logging.info(f"[DB_OP_RESULT] Fetch for '{trigger_text_lower}': data_count={len(response.data) if response.data else 0}")
-        if response.data and len(response.data) > 0:
-            return response.data[0]
-        return None
+        response = await run_db_operation('get_response', db_operation, timeout=DB_READ_TIMEOUT_SECONDS, hedge=True)
+        logging.debug("[DB_OP_RESULT] Fetch for '%s': data_count=%d", trigger_text_lower, len(response.data) if response.data else 0)
+        result = response.data[0] if response.data and len(response.data) > 0 else None
+        _remember_response(trigger_text_lower, result)
+        return result
     except APIError as e:
         logging.error(f"[DB_API_ERROR] During get_response_from_db for '{trigger_text_lower}': code={e.code}, message={e.message}, details={e.details}")
-        return None
+    except (CircuitOpenError, asyncio.TimeoutError) as e:
+        log_sampled(logging.WARNING, "get_response_unavailable", "[DB_UNAVAILABLE] During get_response_from_db: %s %s", type(e).__name__, e)
     except Exception as e:
         logging.error(f"[DB_EXCEPTION] During get_response_from_db for '{trigger_text_lower}': {e}", exc_info=True)
-        return None
+    cached = _response_cache.get(trigger_text_lower, _MISSING)
+    if cached is not _MISSING:
+        logging.debug("[DB_FALLBACK] Serving cached response for '%s'.", trigger_text_lower)
+        return cached
+    return None
 
 async def check_trigger_exists_in_db(trigger_text: str):
     if not supabase:
         logging.error("Supabase client not initialized. Cannot check trigger.")
         return False
     trigger_text_lower = trigger_text.lower()
-    logging.info(f"[DB_OP] Attempting to check existence for trigger: {trigger_text_lower}")
+    logging.debug("[DB_OP] Attempting to check existence for trigger: %s", trigger_text_lower)
     db_operation = lambda: supabase.table('learned_triggers') \
         .select('id', count='exact') \
         .eq('trigger_text', trigger_text_lower) \
         .limit(1) \
         .execute()
     try:
-        response = await asyncio.to_thread(db_operation)
-        logging.info(f"[DB_OP_RESULT] Existence check for '{trigger_text_lower}': count={response.count}")
+        response = await run_db_operation('check_trigger_exists', db_operation, timeout=DB_READ_TIMEOUT_SECONDS, hedge=True)
+        logging.debug("[DB_OP_RESULT] Existence check for '%s': count=%s", trigger_text_lower, response.count)
         return response.count is not None and response.count > 0
     except APIError as e:
         logging.error(f"[DB_API_ERROR] During check_trigger_exists_in_db for '{trigger_text_lower}': code={e.code}, message={e.message}, details={e.details}")
         return False
+    except (CircuitOpenError, asyncio.TimeoutError) as e:
+        log_sampled(logging.WARNING, "check_trigger_unavailable", "[DB_UNAVAILABLE] During check_trigger_exists_in_db: %s %s", type(e).__name__, e)
+        return _response_cache.get(trigger_text_lower) is not None
     except Exception as e:
         logging.error(f"[DB_EXCEPTION] During check_trigger_exists_in_db for '{trigger_text_lower}': {e}", exc_info=True)
         return False
 
-async def get_all_triggers_from_db(): 
+async def get_triggers_page_from_db(offset: int, limit: int):
+    """Satu halaman daftar trigger untuk admin (urut created_at) dan jumlah total: (rows, total).
+
+    Hanya halaman yang diminta yang diambil; None jika DB gagal."""
     if not supabase:
-        logging.error("Supabase client not initialized. Cannot get all triggers.")
-        return []
-    logging.info(f"[DB_OP] Attempting to fetch all triggers from DB.")
+        logging.error("Supabase client not initialized. Cannot get triggers page.")
+        return None
+    logging.debug("[DB_OP] Fetching triggers page: offset=%d limit=%d", offset, limit)
     db_operation = lambda: supabase.table('learned_triggers') \
-        .select('id, trigger_text, response_type, creator_id') \
+        .select('id, trigger_text, response_type, creator_id', count='exact') \
         .order('created_at', desc=False) \
+        .order('id', desc=False) \
+        .range(offset, offset + limit - 1) \
         .execute()
     try:
-        response = await asyncio.to_thread(db_operation)
-        logging.info(f"[DB_OP_RESULT] Fetch all triggers: data_count={len(response.data) if response.data else 0}")
-        return response.data if response.data else []
+        response = await run_db_operation('get_triggers_page', db_operation, hedge=True)
+        logging.debug("[DB_OP_RESULT] Triggers page: data_count=%d total=%s", len(response.data) if response.data else 0, response.count)
+        return response.data or [], response.count or 0
+    except APIError as e:
+        logging.error(f"[DB_API_ERROR] Fetching triggers page at offset {offset}: code={e.code}, message={e.message}, details={e.details}")
+    except (CircuitOpenError, asyncio.TimeoutError) as e:
+        log_sampled(logging.WARNING, "get_triggers_page_unavailable", "[DB_UNAVAILABLE] Fetching triggers page: %s %s", type(e).__name__, e)
+    except Exception as e:
+        logging.error(f"[DB_EXCEPTION] Fetching triggers page at offset {offset}: {e}", exc_info=True)
+    return None
+
+TRIGGER_PAGE_SIZE = 1000  # batas max-rows default PostgREST di Supabase
+
+async def get_trigger_responses_page_from_db(after_id, limit: int = TRIGGER_PAGE_SIZE):
+    """Satu halaman trigger beserta responsnya, terurut id setelah `after_id` (keyset pagination).
+
+    Mengembalikan None jika gagal, bukan [], supaya pemanggil bisa membedakan "tidak ada trigger
+    lagi" dari "DB tidak bisa dihubungi"."""
+    if not supabase:
+        logging.error("Supabase client not initialized. Cannot get trigger responses.")
+        return None
+    try:
+        def operation():
+            query = supabase.table('learned_triggers') \
+                .select('id, trigger_text, response_type, response_content') \
+                .order('id', desc=False) \
+                .limit(limit)
+            if after_id is not None:
+                query = query.gt('id', after_id)
+            return query.execute()
+        response = await run_db_operation('get_trigger_responses_page', operation)
+        return response.data or []
     except APIError as e:
-        logging.error(f"[DB_API_ERROR] During get_all_triggers_from_db: code={e.code}, message={e.message}, details={e.details}")
-        return []
+        logging.error(f"[DB_API_ERROR] Fetching trigger responses after id {after_id}: code={e.code}, message={e.message}, details={e.details}")
+    except (CircuitOpenError, asyncio.TimeoutError) as e:
+        logging.warning(f"[DB_UNAVAILABLE] Fetching trigger responses after id {after_id}: {type(e).__name__} {e}")
     except Exception as e:
-        logging.error(f"[DB_EXCEPTION] During get_all_triggers_from_db: {e}", exc_info=True)
-        return []
+        logging.error(f"[DB_EXCEPTION] Fetching trigger responses after id {after_id}: {e}", exc_info=True)
+    return None
 
 async def delete_trigger_from_db(trigger_text: str): 
     if not supabase:
@@ -130,13 +217,17 @@ async def delete_trigger_from_db(trigger_text: str):
         .eq('trigger_text', trigger_text_lower) \
         .execute()
     try:
-        response = await asyncio.to_thread(db_operation)
+        response = await run_db_operation('delete_trigger', db_operation)
         deleted_count = len(response.data) if response.data else 0
         logging.info(f"[DB_OP_RESULT] Delete for '{trigger_text_lower}': {deleted_count} row(s) affected.")
+        _response_cache.pop(trigger_text_lower, None)
         return bool(deleted_count > 0)
     except APIError as e:
         logging.error(f"[DB_API_ERROR] During delete_trigger_from_db for '{trigger_text_lower}': code={e.code}, message={e.message}, details={e.details}")
         return False
+    except (CircuitOpenError, asyncio.TimeoutError) as e:
+        logging.error(f"[DB_UNAVAILABLE] During delete_trigger_from_db for '{trigger_text_lower}': {type(e).__name__} {e}")
+        return False
     except Exception as e:
         logging.error(f"[DB_EXCEPTION] During delete_trigger_from_db for '{trigger_text_lower}': {e}", exc_info=True)
         return False
@@ -151,7 +242,7 @@ async def add_admin_to_db(user_id_to_add: int, added_by_user_id: int) -> bool:
             'user_id': user_id_to_add,
             'added_by': added_by_user_id
         }).execute()
-        response = await asyncio.to_thread(operation)
+        response = await run_db_operation('add_admin', operation)
 
         
         if response.data and len(response.data) > 0:
@@ -166,6 +257,9 @@ async def add_admin_to_db(user_id_to_add: int, added_by_user_id: int) -> bool:
             return True 
         logging.error(f"[DB_API_ERROR] Adding admin {user_id_to_add}: code={e.code}, message={e.message}, details={e.details}")
         return False
+    except (CircuitOpenError, asyncio.TimeoutError) as e:
+        logging.error(f"[DB_UNAVAILABLE] Adding admin {user_id_to_add}: {type(e).__name__} {e}")
+        return False
     except Exception as e:
         logging.error(f"[DB_EXCEPTION] Adding admin {user_id_to_add}: {e}", exc_info=True)
         return False
@@ -177,7 +271,7 @@ async def remove_admin_from_db(user_id_to_remove: int) -> bool:
     try:
         logging.info(f"[DB_OP_ADMIN] Attempting to remove admin: {user_id_to_remove}")
         operation = lambda: supabase.table('bot_admins').delete().eq('user_id', user_id_to_remove).execute()
-        response = await asyncio.to_thread(operation)
+        response = await run_db_operation('remove_admin', operation)
 
         
         if response.data and len(response.data) > 0:
@@ -188,26 +282,159 @@ async def remove_admin_from_db(user_id_to_remove: int) -> bool:
     except APIError as e:
         logging.error(f"[DB_API_ERROR] Removing admin {user_id_to_remove}: code={e.code}, message={e.message}, details={e.details}")
         return False
+    except (CircuitOpenError, asyncio.TimeoutError) as e:
+        logging.error(f"[DB_UNAVAILABLE] Removing admin {user_id_to_remove}: {type(e).__name__} {e}")
+        return False
     except Exception as e:
         logging.error(f"[DB_EXCEPTION] Removing admin {user_id_to_remove}: {e}", exc_info=True)
         return False
 
-async def get_all_admins_from_db() -> list:
+async def get_all_admins_from_db():
+    """Semua baris bot_admins, atau None jika DB gagal (supaya pemanggil tidak menganggap daftar kosong)."""
     if not supabase:
         logging.error("Supabase client not initialized. Cannot get admins.")
-        return []
+        return None
     try:
-        logging.info(f"[DB_OP_ADMIN] Attempting to fetch all admins from DB.")
+        logging.debug("[DB_OP_ADMIN] Attempting to fetch all admins from DB.")
         operation = lambda: supabase.table('bot_admins').select('user_id, added_by, added_at').execute()
-        response = await asyncio.to_thread(operation)
+        response = await run_db_operation('get_all_admins', operation, hedge=True)
 
-        logging.info(f"[DB_OP_ADMIN_RESULT] Fetched {len(response.data) if response.data else 0} admins.")
+        logging.debug("[DB_OP_ADMIN_RESULT] Fetched %d admins.", len(response.data) if response.data else 0)
         return response.data if response.data else []
     except APIError as e:
         logging.error(f"[DB_API_ERROR] Fetching all admins: code={e.code}, message={e.message}, details={e.details}")
-        return []
+        return None
+    except (CircuitOpenError, asyncio.TimeoutError) as e:
+        log_sampled(logging.WARNING, "get_all_admins_unavailable", "[DB_UNAVAILABLE] Fetching all admins: %s %s", type(e).__name__, e)
+        return None
     except Exception as e:
         logging.error(f"[DB_EXCEPTION] Fetching all admins: {e}", exc_info=True)
-        return []
+        return None
+
+async def upsert_chats_to_db(chat_rows: list) -> bool:
+    """Upsert sekumpulan chat ke bot_chats dalam satu request (dipakai utils/chat_registry.py)."""
+    if not supabase:
+        logging.error("Supabase client not initialized. Cannot upsert chats.")
+        return False
+    if not chat_rows:
+        return True
+    try:
+        operation = lambda: supabase.table('bot_chats').upsert(chat_rows, on_conflict='chat_id').execute()
+        await run_db_operation('upsert_chats', operation)
+        logging.debug("[DB_OP_RESULT] Upserted %d chats.", len(chat_rows))
+        return True
+    except APIError as e:
+        logging.error(f"[DB_API_ERROR] Upserting {len(chat_rows)} chats: code={e.code}, message={e.message}, details={e.details}")
+        return False
+    except (CircuitOpenError, asyncio.TimeoutError) as e:
+        logging.warning(f"[DB_UNAVAILABLE] Upserting {len(chat_rows)} chats: {type(e).__name__} {e}")
+        return False
+    except Exception as e:
+        logging.error(f"[DB_EXCEPTION] Upserting {len(chat_rows)} chats: {e}", exc_info=True)
+        return False
 
-init_supabase_client()
+async def get_chat_ids_page_from_db(after_chat_id, limit: int):
+    """Satu halaman chat_id terurut setelah `after_chat_id` (keyset pagination). None jika gagal."""
+    if not supabase:
+        logging.error("Supabase client not initialized. Cannot get chats.")
+        return None
+    try:
+        def operation():
+            query = supabase.table('bot_chats').select('chat_id').order('chat_id', desc=False).limit(limit)
+            if after_chat_id is not None:
+                query = query.gt('chat_id', after_chat_id)
+            return query.execute()
+        response = await run_db_operation('get_chat_ids_page', operation)
+        return [row['chat_id'] for row in response.data or []]
+    except APIError as e:
+        logging.error(f"[DB_API_ERROR] Fetching chats after {after_chat_id}: code={e.code}, message={e.message}, details={e.details}")
+        return None
+    except (CircuitOpenError, asyncio.TimeoutError) as e:
+        logging.warning(f"[DB_UNAVAILABLE] Fetching chats after {after_chat_id}: {type(e).__name__} {e}")
+        return None
+    except Exception as e:
+        logging.error(f"[DB_EXCEPTION] Fetching chats after {after_chat_id}: {e}", exc_info=True)
+        return None
+
+async def count_chats_in_db():
+    if not supabase:
+        return None
+    try:
+        operation = lambda: supabase.table('bot_chats').select('chat_id', count='exact').limit(1).execute()
+        response = await run_db_operation('count_chats', operation)
+        return response.count
+    except (APIError, CircuitOpenError, asyncio.TimeoutError) as e:
+        logging.warning(f"[DB_UNAVAILABLE] Counting chats: {type(e).__name__} {e}")
+        return None
+    except Exception as e:
+        logging.error(f"[DB_EXCEPTION] Counting chats: {e}", exc_info=True)
+        return None
+
+async def delete_chats_from_db(chat_ids: list) -> bool:
+    if not supabase:
+        logging.error("Supabase client not initialized. Cannot delete chats.")
+        return False
+    if not chat_ids:
+        return True
+    try:
+        operation = lambda: supabase.table('bot_chats').delete().in_('chat_id', chat_ids).execute()
+        await run_db_operation('delete_chats', operation)
+        logging.info(f"[DB_OP_RESULT] Pruned {len(chat_ids)} chats from registry.")
+        return True
+    except APIError as e:
+        logging.error(f"[DB_API_ERROR] Deleting {len(chat_ids)} chats: code={e.code}, message={e.message}, details={e.details}")
+        return False
+    except (CircuitOpenError, asyncio.TimeoutError) as e:
+        logging.warning(f"[DB_UNAVAILABLE] Deleting {len(chat_ids)} chats: {type(e).__name__} {e}")
+        return False
+    except Exception as e:
+        logging.error(f"[DB_EXCEPTION] Deleting {len(chat_ids)} chats: {e}", exc_info=True)
+        return False
+
+async def insert_audit_events_to_db(events: list) -> bool:
+    """Menulis satu batch event audit dalam satu request (dipakai utils/audit_log.py)."""
+    if not supabase:
+        logging.error("Supabase client not initialized. Cannot write audit events.")
+        return False
+    if not events:
+        return True
+    try:
+        operation = lambda: supabase.table('audit_log').insert(events).execute()
+        await run_db_operation('insert_audit_events', operation)
+        logging.debug("[DB_OP_RESULT] Wrote %d audit events.", len(events))
+        return True
+    except APIError as e:
+        logging.error(f"[DB_API_ERROR] Writing {len(events)} audit events: code={e.code}, message={e.message}, details={e.details}")
+        return False
+    except (CircuitOpenError, asyncio.TimeoutError) as e:
+        logging.warning(f"[DB_UNAVAILABLE] Writing {len(events)} audit events: {type(e).__name__} {e}")
+        return False
+    except Exception as e:
+        logging.error(f"[DB_EXCEPTION] Writing {len(events)} audit events: {e}", exc_info=True)
+        return False
+
+async def get_audit_events_page_from_db(before_id, limit: int):
+    """Event audit terbaru lebih dulu, dengan id < before_id (cursor). None jika gagal."""
+    if not supabase:
+        logging.error("Supabase client not initialized. Cannot read audit events.")
+        return None
+    try:
+        def operation():
+            query = supabase.table('audit_log') \
+                .select('id, actor_id, action, target, details, success, created_at') \
+                .order('id', desc=True) \
+                .limit(limit)
+            if before_id is not None:
+                query = query.lt('id', before_id)
+            return query.execute()
+        response = await run_db_operation('get_audit_events_page', operation, timeout=DB_READ_TIMEOUT_SECONDS)
+        return response.data or []
+    except APIError as e:
+        logging.error(f"[DB_API_ERROR] Reading audit events before {before_id}: code={e.code}, message={e.message}, details={e.details}")
+        return None
+    except (CircuitOpenError, asyncio.TimeoutError) as e:
+        logging.warning(f"[DB_UNAVAILABLE] Reading audit events before {before_id}: {type(e).__name__} {e}")
+        return None
+    except Exception as e:
+        logging.error(f"[DB_EXCEPTION] Reading audit events before {before_id}: {e}", exc_info=True)
+        return None
@@ -0,0 +1,94 @@
+import hashlib
+import logging
+from collections import OrderedDict
+from aiogram.types import (
+    InlineQueryResultArticle,
+    InlineQueryResultCachedPhoto,
+    InlineQueryResultCachedGif,
+    InlineQueryResultCachedSticker,
+    InputTextMessageContent,
+)
+from config import INLINE_RESULT_CACHE_SIZE
+
+PREVIEW_LENGTH = 64
+
+
+def _result_id(trigger_text: str) -> str:
+    return hashlib.md5(trigger_text.encode("utf-8")).hexdigest()
+
+
+def is_templated(response_type: str, content: str) -> bool:
+    """Respons teks dengan placeholder harus dirender per user, jadi tidak bisa diprecompute."""
+    return response_type == "text" and "{" in content
+
+
+def build_result(trigger_text: str, response_type: str, content: str, text: str = None):
+    """Membuat objek InlineQueryResult untuk satu trigger. `text` = isi teks yang sudah dirender."""
+    result_id = _result_id(trigger_text)
+    if response_type == "text":
+        text = content if text is None else text
+        return InlineQueryResultArticle(
+            id=result_id,
+            title=trigger_text,
+            description=text[:PREVIEW_LENGTH],
+            input_message_content=InputTextMessageContent(message_text=text),
+        )
+    if response_type == "photo":
+        return InlineQueryResultCachedPhoto(id=result_id, photo_file_id=content, title=trigger_text)
+    if response_type == "animation":
+        return InlineQueryResultCachedGif(id=result_id, gif_file_id=content, title=trigger_text)
+    if response_type == "sticker":
+        return InlineQueryResultCachedSticker(id=result_id, sticker_file_id=content)
+    return None
+
+
+class InlineTriggerIndex:
+    """Pencarian prefix inline mode di atas TriggerStore (lihat utils/trigger_store.py).
+
+    Objek InlineQueryResult untuk respons non-template dibuat sekali per trigger lalu disimpan
+    di LRU terbatas, jadi trigger populer tidak dibuat ulang tanpa harus menyimpan satu objek
+    pydantic untuk setiap trigger. Respons teks dengan placeholder dirender oleh handler.
+    """
+
+    def __init__(self, cache_size: int = INLINE_RESULT_CACHE_SIZE):
+        self.store = None
+        self.cache_size = cache_size
+        self._results = OrderedDict()  # trigger_text -> InlineQueryResult
+
+    def __len__(self):
+        return len(self.store) if self.store is not None else 0
+
+    def attach(self, store):
+        self.store = store
+        self._results.clear()
+        logging.info("Inline index attached to trigger store: %d triggers.", len(store))
+
+    def invalidate(self, trigger_text: str):
+        self._results.pop(trigger_text, None)
+
+    def _result_for(self, record):
+        result = self._results.get(record.trigger_text)
+        if result is not None:
+            self._results.move_to_end(record.trigger_text)
+            return result
+        result = build_result(record.trigger_text, record.response_type.label, record.response_content)
+        if result is not None:
+            self._results[record.trigger_text] = result
+            if len(self._results) > self.cache_size:
+                self._results.popitem(last=False)
+        return result
+
+    def search(self, prefix: str, offset: int = 0, limit: int = 20):
+        """Mengembalikan ([(trigger_text, response_type, content, result_or_None)], next_offset)."""
+        if self.store is None:
+            return [], None
+        records = self.store.prefix(prefix, offset, limit + 1)
+        matches = []
+        for record in records[:limit]:
+            response_type, content = record.response_type.label, record.response_content
+            result = None if is_templated(response_type, content) else self._result_for(record)
+            matches.append((record.trigger_text, response_type, content, result))
+        return matches, (offset + limit if len(records) > limit else None)
+
+
+index = InlineTriggerIndex()
@@ -0,0 +1,98 @@
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import time
+from config import LOG_LEVEL, LOG_JSON, LOG_SAMPLE_INTERVAL_SECONDS
+
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(name)s - [%(filename)s:%(lineno)d] - %(message)s'
+
+
+class JsonFormatter(logging.Formatter):
+    """Satu objek JSON per baris, untuk dikirim ke log collector."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "where": f"{record.filename}:{record.lineno}",
+            "msg": record.getMessage(),
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            payload["exc"] = record.exc_text
+        return json.dumps(payload, ensure_ascii=False)
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    # Pesan (msg % args) dan traceback dibentuk di thread pemanggil, karena args bisa berisi
+    # dict/list yang masih diubah sebelum listener sempat memformatnya. Yang ditunda ke thread
+    # QueueListener hanya format baris akhir (asctime, JSON) dan I/O-nya.
+    _exc_formatter = logging.Formatter()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        if record.exc_info:
+            record.exc_text = record.exc_text or self._exc_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class LogSampler:
+    """Membatasi pesan berulang (mis. warning per-pesan saat DB down) ke satu per interval per key."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._state = {}
+
+    def log(self, level: int, key: str, msg: str, *args):
+        if not logging.getLogger().isEnabledFor(level):
+            return
+        now = time.monotonic()
+        state = self._state.get(key)
+        if state is not None and now - state[0] < self.interval:
+            state[1] += 1
+            return
+        suppressed = state[1] if state is not None else 0
+        self._state[key] = [now, 0]
+        if suppressed:
+            msg += " (%d similar messages suppressed)"
+            args += (suppressed,)
+        logging.log(level, msg, *args, stacklevel=3)
+
+
+sampler = LogSampler(LOG_SAMPLE_INTERVAL_SECONDS)
+
+
+def log_sampled(level: int, key: str, msg: str, *args):
+    sampler.log(level, key, msg, *args)
+
+
+def setup_logging(level: str = None, json_output: bool = None, stream=None) -> logging.handlers.QueueListener:
+    """Memasang QueueHandler di root logger; I/O dan formatting berjalan di thread QueueListener.
+
+    Kembalikan listener-nya; panggil listener.stop() saat shutdown supaya sisa log di-flush.
+    """
+    level = level or LOG_LEVEL
+    json_output = LOG_JSON if json_output is None else json_output
+
+    output_handler = logging.StreamHandler(stream or sys.stderr)
+    output_handler.setFormatter(JsonFormatter() if json_output else logging.Formatter(LOG_FORMAT))
+
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+        handler.close()
+    root.addHandler(_DeferredQueueHandler(log_queue))
+    root.setLevel(level)
+
+    listener = logging.handlers.QueueListener(log_queue, output_handler, respect_handler_level=True)
+    listener.start()
+    return listener
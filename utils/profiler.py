@@ -0,0 +1,343 @@
+import asyncio
+import html
+import inspect
+import logging
+import os
+import selectors
+import sys
+import threading
+import time
+import zlib
+from collections import Counter
+from config import PROFILE_SAMPLE_INTERVAL_MS, LOOP_LAG_THRESHOLD_MS
+
+# Frame dari file di bawah direktori ini dianggap "kode bot" (bukan aiogram/asyncio/stdlib).
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HANDLERS_DIR = os.path.join(PROJECT_DIR, "handlers")
+
+
+def _is_project_file(filename: str) -> bool:
+    # Virtualenv di dalam repo (.venv/lib/.../site-packages) bukan kode bot.
+    return filename.startswith(PROJECT_DIR + os.sep) and f"{os.sep}site-packages{os.sep}" not in filename
+
+
+def _is_handler_file(filename: str) -> bool:
+    return filename.startswith(HANDLERS_DIR + os.sep)
+
+
+def _frame_label(code) -> str:
+    module = os.path.basename(code.co_filename)
+    if module.endswith(".py"):
+        module = module[:-3]
+    return f"{module}:{code.co_name}"
+
+
+def _collapse(frame) -> str:
+    """Stack frame -> 'root;...;leaf' (format collapsed stacks untuk flamegraph)."""
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame.f_code))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+def _coroutine_chain(task: asyncio.Task) -> list:
+    """Rantai frame coroutine sebuah task, dari luar (task) ke dalam (titik await terdalam)."""
+    frames = []
+    coro = task.get_coro()
+    while coro is not None:
+        frame = getattr(coro, "cr_frame", None) or getattr(coro, "gi_frame", None)
+        if frame is None:
+            break
+        frames.append(frame)
+        coro = getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None)
+    return frames
+
+
+def _describe_frame(frame) -> str:
+    filename = frame.f_code.co_filename
+    if _is_project_file(filename):
+        filename = os.path.relpath(filename, PROJECT_DIR)
+    else:
+        filename = os.path.basename(filename)
+    return f"{filename}:{frame.f_code.co_name}:{frame.f_lineno}"
+
+
+def _describe_await(chain: list) -> str:
+    """Titik await terdalam di kode bot, plus fungsi library yang sedang ditunggu (jika ada)."""
+    project_frames = [frame for frame in chain if _is_project_file(frame.f_code.co_filename)]
+    if not project_frames:
+        return _frame_label(chain[-1].f_code)
+    site = _describe_frame(project_frames[-1])
+    if chain[-1] is project_frames[-1]:
+        return site
+    return f"{site} -> {_frame_label(chain[-1].f_code)}"
+
+
+# Modul event loop asyncio di antara runner dan callback. uvloop menjalankan loop di C, jadi di sana
+# callback langsung berada di atas frame runner.
+_LOOP_MODULE_FILES = {asyncio.base_events.__file__, asyncio.events.__file__, asyncio.selector_events.__file__}
+_CORO_FLAGS = inspect.CO_COROUTINE | inspect.CO_ITERABLE_COROUTINE | inspect.CO_GENERATOR | inspect.CO_ASYNC_GENERATOR
+
+
+def loop_entry_frame(frame):
+    """Frame Python yang menjalankan event loop (mis. runners:run), dicari dari frame coroutine di loop itu.
+
+    Saat loop menunggu I/O tanpa callback, frame ini adalah frame terdalam thread loop (uvloop),
+    atau tepat di bawah base_events/selectors (asyncio).
+    """
+    while frame is not None and (frame.f_code.co_flags & _CORO_FLAGS or frame.f_code.co_filename in _LOOP_MODULE_FILES):
+        frame = frame.f_back
+    return frame
+
+
+def find_handler_frame(frames: list):
+    """Frame handler terluar (file di handlers/) dari daftar frame luar->dalam, atau None."""
+    for frame in frames:
+        if _is_handler_file(frame.f_code.co_filename):
+            return frame
+    return None
+
+
+def find_project_frame(frames: list):
+    """Frame kode bot terdalam dari daftar frame luar->dalam, atau None."""
+    for frame in reversed(frames):
+        if _is_project_file(frame.f_code.co_filename):
+            return frame
+    return None
+
+
+class SamplingProfiler:
+    """Profiler sampling untuk event loop yang sedang berjalan, tanpa instrumentasi.
+
+    Thread terpisah mengambil snapshot stack thread event loop (sys._current_frames) dan
+    rantai await semua task setiap interval. Hasilnya:
+      - stacks: collapsed stacks thread loop (CPU di loop, termasuk idle di select)
+      - idle: jumlah sampel saat loop menunggu I/O tanpa menjalankan callback
+      - handler_wall / await_wall: estimasi waktu dinding per handler dan per titik await
+        (hanya task yang sedang berada di handlers/, bukan task latar)
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, loop_thread_id: int, interval: float, exclude_task=None,
+                 loop_entry=None):
+        self.loop = loop
+        self.loop_thread_id = loop_thread_id
+        self.loop_entry = loop_entry  # hasil loop_entry_frame(), untuk mengenali loop yang idle
+        self.exclude_task = exclude_task  # task yang menjalankan /profile itu sendiri
+        self.interval = interval
+        self.stacks = Counter()
+        self.handler_wall = Counter()
+        self.await_wall = Counter()
+        self.samples = 0
+        self.idle = 0
+        self.duration = 0.0
+        self._stop = threading.Event()
+
+    def _is_idle(self, frame) -> bool:
+        if frame is self.loop_entry:
+            return True  # uvloop: loop menunggu di C, tidak ada callback Python yang berjalan
+        if frame.f_code.co_filename != selectors.__file__:
+            return False
+        # asyncio: selector dipanggil langsung dari base_events di atas frame runner.
+        frame = frame.f_back
+        while frame is not None and frame.f_code.co_filename in _LOOP_MODULE_FILES:
+            frame = frame.f_back
+        return self.loop_entry is None or frame is self.loop_entry
+
+    def _sample(self):
+        frame = sys._current_frames().get(self.loop_thread_id)
+        if frame is not None:
+            self.stacks[_collapse(frame)] += 1
+            self.idle += self._is_idle(frame)
+        try:
+            tasks = asyncio.all_tasks(self.loop)
+        except RuntimeError:
+            tasks = ()
+        for task in tasks:
+            if task is self.exclude_task:
+                continue
+            chain = _coroutine_chain(task)
+            if not chain:
+                continue
+            handler_frame = find_handler_frame(chain)
+            if handler_frame is None:
+                continue  # task latar (polling, flusher, writer audit) yang hanya menunggu
+            self.handler_wall[_frame_label(handler_frame.f_code)] += self.interval
+            self.await_wall[_describe_await(chain)] += self.interval
+        self.samples += 1
+
+    def run(self, seconds: float):
+        started = time.monotonic()
+        deadline = started + seconds
+        while not self._stop.is_set() and time.monotonic() < deadline:
+            self._sample()
+            self._stop.wait(self.interval)
+        self.duration = time.monotonic() - started
+
+    def stop(self):
+        self._stop.set()
+
+    def collapsed_stacks(self) -> str:
+        return "\n".join(f"{stack} {count}" for stack, count in self.stacks.most_common()) + "\n"
+
+    def summary(self, top: int = 10) -> str:
+        lines = [f"Samples: {self.samples} over {self.duration:.1f}s (interval {self.interval * 1000:.0f} ms)"]
+        if self.samples:
+            lines.append(f"Event loop busy: {100 - self.idle * 100 / self.samples:.1f}%")
+        lines.append("")
+        lines.append("Top handlers by wall time:")
+        lines.extend(f"  {seconds:7.2f}s  {name}" for name, seconds in self.handler_wall.most_common(top))
+        lines.append("")
+        lines.append("Top awaits by wall time:")
+        lines.extend(f"  {seconds:7.2f}s  {name}" for name, seconds in self.await_wall.most_common(top))
+        return "\n".join(lines)
+
+    def flamegraph_svg(self, width: int = 1200, row_height: int = 16) -> str:
+        root = {"children": {}, "count": 0}
+        for stack, count in self.stacks.items():
+            node = root
+            node["count"] += count
+            for label in stack.split(";"):
+                node = node["children"].setdefault(label, {"children": {}, "count": 0})
+                node["count"] += count
+
+        rects = []
+        max_depth = [0]
+
+        def layout(node, x: float, depth: int):
+            max_depth[0] = max(max_depth[0], depth)
+            for label, child in sorted(node["children"].items()):
+                child_width = child["count"] / root["count"] * width if root["count"] else 0
+                if child_width >= 0.5:
+                    rects.append((x, depth, child_width, label, child["count"]))
+                    layout(child, x, depth + 1)
+                x += child_width
+
+        layout(root, 0.0, 0)
+        height = (max_depth[0] + 1) * row_height + 24
+        parts = [
+            f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" font-family="monospace" font-size="11">',
+            f'<text x="4" y="14">samples: {root["count"]}</text>',
+        ]
+        for x, depth, rect_width, label, count in rects:
+            y = height - (depth + 1) * row_height
+            hue = zlib.crc32(label.split(":")[0].encode()) % 60
+            title = html.escape(f"{label} ({count} samples, {count * 100 / root['count']:.1f}%)")
+            parts.append(
+                f'<g><title>{title}</title><rect x="{x:.1f}" y="{y}" width="{rect_width:.1f}" height="{row_height - 1}" '
+                f'fill="hsl({hue},80%,60%)"/>'
+            )
+            if rect_width > 40:
+                max_chars = int(rect_width / 7)
+                parts.append(f'<text x="{x + 2:.1f}" y="{y + row_height - 4}">{html.escape(label[:max_chars])}</text>')
+            parts.append("</g>")
+        parts.append("</svg>")
+        return "\n".join(parts)
+
+
+# Hanya satu sesi profiling dalam satu waktu. Slot dipesan tanpa await (claim_profile), jadi dua
+# /profile yang datang bersamaan tidak bisa sama-sama lolos.
+_profiling = False
+
+
+def profile_in_progress() -> bool:
+    return _profiling
+
+
+def claim_profile() -> bool:
+    """Memesan slot profiling. False jika sudah ada sesi yang berjalan."""
+    global _profiling
+    if _profiling:
+        return False
+    _profiling = True
+    return True
+
+
+def release_profile():
+    global _profiling
+    _profiling = False
+
+
+async def profile_event_loop(seconds: float, interval: float = None) -> SamplingProfiler:
+    """Menjalankan SamplingProfiler di thread selama `seconds` detik, lalu melepas slot claim_profile()."""
+    try:
+        profiler = SamplingProfiler(asyncio.get_running_loop(), threading.get_ident(),
+                                    (interval or PROFILE_SAMPLE_INTERVAL_MS) / 1000,
+                                    exclude_task=asyncio.current_task(),
+                                    loop_entry=loop_entry_frame(sys._getframe()))
+        try:
+            await asyncio.to_thread(profiler.run, seconds)
+        finally:
+            profiler.stop()
+        return profiler
+    finally:
+        release_profile()
+
+
+class LoopLagMonitor:
+    """Mendeteksi event loop yang terblokir: callback heartbeat di loop + thread pengawas.
+
+    Jika heartbeat terlambat melebihi threshold, thread pengawas mengambil stack thread loop
+    saat itu juga, sehingga handler yang sedang memblokir bisa disebut namanya di log.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, threshold: float, interval: float = None):
+        self.loop = loop
+        self.threshold = threshold
+        self.interval = interval or min(threshold / 2, 0.05)
+        self.loop_thread_id = None
+        self._last_beat = time.monotonic()
+        self._stop = threading.Event()
+        self._thread = None
+        self._handle = None
+
+    def _beat(self):
+        # Hanya mencatat waktu; laporan (dengan stack pelakunya) dibuat oleh _watch.
+        self._last_beat = time.monotonic()
+        self._handle = self.loop.call_later(self.interval, self._beat)
+
+    def _watch(self):
+        reported_beat = None
+        while not self._stop.wait(self.interval):
+            last_beat = self._last_beat
+            stalled = time.monotonic() - last_beat - self.interval
+            if stalled <= self.threshold or reported_beat == last_beat:
+                continue
+            reported_beat = last_beat
+            frame = sys._current_frames().get(self.loop_thread_id)
+            if frame is None:
+                continue
+            frames = []
+            while frame is not None:
+                frames.append(frame)
+                frame = frame.f_back
+            frames.reverse()
+            culprit = find_handler_frame(frames) or find_project_frame(frames)
+            logging.warning(
+                "[LOOP_LAG] Event loop blocked for %.0f ms in %s (innermost: %s)",
+                stalled * 1000,
+                _describe_frame(culprit) if culprit else "<non-project code>",
+                _describe_frame(frames[-1]),
+            )
+
+    def start(self):
+        self.loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._handle = self.loop.call_later(self.interval, self._beat)
+        self._thread = threading.Thread(target=self._watch, name="loop-lag-monitor", daemon=True)
+        self._thread.start()
+        logging.info("Loop lag monitor started (threshold %.0f ms).", self.threshold * 1000)
+
+    def stop(self):
+        self._stop.set()
+        if self._handle:
+            self._handle.cancel()
+
+
+def start_loop_monitor(threshold_ms: float = LOOP_LAG_THRESHOLD_MS):
+    """Memasang LoopLagMonitor pada loop yang sedang berjalan. Mengembalikan None jika dinonaktifkan."""
+    if threshold_ms <= 0:
+        return None
+    monitor = LoopLagMonitor(asyncio.get_running_loop(), threshold_ms / 1000)
+    monitor.start()
+    return monitor
@@ -0,0 +1,58 @@
+import logging
+import os
+import time
+from config import READY_FILE
+
+_ready = False
+
+
+def is_ready() -> bool:
+    return _ready
+
+
+def mark_ready():
+    """Menandai bot siap (cache sudah hangat): tulis READY_FILE dan /ready mulai menjawab 200."""
+    global _ready
+    _ready = True
+    if READY_FILE:
+        try:
+            with open(READY_FILE, 'w', encoding='utf-8') as f:
+                f.write(f"{time.time():.3f}\n")
+        except OSError as e:
+            logging.error(f"Failed to write readiness file {READY_FILE}: {e}")
+    logging.info("Bot is ready.")
+
+
+def mark_not_ready():
+    global _ready
+    _ready = False
+    if READY_FILE and os.path.exists(READY_FILE):
+        try:
+            os.remove(READY_FILE)
+        except OSError as e:
+            logging.error(f"Failed to remove readiness file {READY_FILE}: {e}")
+
+
+async def start_probe_server(port: int, host: str = "0.0.0.0"):
+    """HTTP probe: GET /health (liveness, selalu 200) dan GET /ready (200 jika siap, 503 jika belum).
+
+    Mengembalikan AppRunner; panggil `await runner.cleanup()` saat shutdown.
+    """
+    from aiohttp import web
+
+    async def health(request):
+        return web.Response(text="ok")
+
+    async def ready(request):
+        if _ready:
+            return web.Response(text="ready")
+        return web.Response(status=503, text="warming up")
+
+    app = web.Application()
+    app.router.add_get("/health", health)
+    app.router.add_get("/ready", ready)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    logging.info(f"Readiness probe listening on {host}:{port} (/health, /ready).")
+    return runner
@@ -0,0 +1,178 @@
+import asyncio
+import logging
+import math
+import sys
+import time
+from collections import deque
+from config import (
+    DB_TIMEOUT_SECONDS,
+    DB_BREAKER_FAILURE_THRESHOLD,
+    DB_BREAKER_RESET_SECONDS,
+    DB_HEDGE_READS,
+    DB_HEDGE_MIN_DELAY_SECONDS,
+)
+
+
+class CircuitOpenError(Exception):
+    """Dilempar saat circuit breaker terbuka, operasi DB tidak dijalankan sama sekali."""
+
+
+class CircuitBreaker:
+    """Circuit breaker sederhana: closed -> open setelah N kegagalan beruntun,
+    lalu half-open (satu probe) setelah reset_timeout detik."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+
+    def allow(self) -> bool:
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                return False
+            self.state = self.HALF_OPEN
+            self._probe_in_flight = False
+            logging.info("[DB_BREAKER] Reset timeout elapsed, moving to half-open.")
+        # HALF_OPEN: hanya satu probe yang boleh lewat
+        if self._probe_in_flight:
+            return False
+        self._probe_in_flight = True
+        return True
+
+    def release_probe(self):
+        self._probe_in_flight = False
+
+    def record_success(self):
+        if self.state != self.CLOSED:
+            logging.info("[DB_BREAKER] Probe succeeded, closing circuit.")
+        self.state = self.CLOSED
+        self.failures = 0
+        self._probe_in_flight = False
+
+    def record_failure(self, op_name: str):
+        self.failures += 1
+        self._probe_in_flight = False
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                logging.error(f"[DB_BREAKER] Opening circuit after failure in '{op_name}' ({self.failures} consecutive failures).")
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+
+class LatencyTracker:
+    """Menyimpan latensi operasi baca terakhir untuk menghitung p95 (dipakai sebagai jeda hedging)."""
+
+    def __init__(self, maxlen: int = 200, min_samples: int = 20):
+        self.samples = deque(maxlen=maxlen)
+        self.min_samples = min_samples
+
+    def observe(self, seconds: float):
+        self.samples.append(seconds)
+
+    def p95(self):
+        if len(self.samples) < self.min_samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, math.ceil(len(ordered) * 0.95) - 1)]
+
+
+breaker = CircuitBreaker(DB_BREAKER_FAILURE_THRESHOLD, DB_BREAKER_RESET_SECONDS)
+read_latency = LatencyTracker()
+
+
+def _is_transport_error(exc: BaseException) -> bool:
+    # httpx baru diimpor bersama supabase; selama belum terimpor, error ini pasti bukan dari httpx.
+    httpx = sys.modules.get("httpx")
+    return httpx is not None and isinstance(exc, httpx.TransportError)
+
+
+def is_server_fault(exc: BaseException) -> bool:
+    """True jika error menandakan backend bermasalah (timeout, koneksi, 5xx, PGRST0xx),
+    bukan error dari request itu sendiri (mis. unique violation 23505) atau bug di kode kita."""
+    if isinstance(exc, (asyncio.TimeoutError, CircuitOpenError)) or _is_transport_error(exc):
+        return True
+    if not hasattr(exc, "message"):
+        return False  # TypeError, KeyError, dll.: bug, bukan backend
+    code_str = str(getattr(exc, "code", None))
+    return (len(code_str) == 3 and code_str.startswith("5")) or code_str.startswith("PGRST0")
+
+
+def _consume_result(task: asyncio.Future):
+    # Hasil task yang kalah balapan hedging diabaikan, tapi exception-nya tetap diambil
+    # supaya asyncio tidak mencatat "exception was never retrieved".
+    if not task.cancelled():
+        task.exception()
+
+
+async def _run_hedged(operation, timeout: float):
+    delay = read_latency.p95()
+    delay = max(delay if delay is not None else DB_HEDGE_MIN_DELAY_SECONDS, DB_HEDGE_MIN_DELAY_SECONDS)
+    deadline = time.monotonic() + timeout
+
+    primary = asyncio.ensure_future(asyncio.to_thread(operation))
+    primary.add_done_callback(_consume_result)
+    done, _ = await asyncio.wait({primary}, timeout=min(delay, timeout))
+    if done:
+        return primary.result()
+
+    hedge = asyncio.ensure_future(asyncio.to_thread(operation))
+    hedge.add_done_callback(_consume_result)
+    pending = {primary, hedge}
+    last_exc = None
+    while pending:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            if task.exception() is None:
+                for other in pending:
+                    other.cancel()
+                return task.result()
+            last_exc = task.exception()
+    for task in pending:
+        task.cancel()
+    if last_exc is not None and not pending:
+        raise last_exc
+    raise asyncio.TimeoutError()
+
+
+async def run_db_operation(op_name: str, operation, timeout: float = None, hedge: bool = False):
+    """Menjalankan operasi supabase (sync) di thread dengan deadline dan circuit breaker.
+
+    Melempar CircuitOpenError jika breaker terbuka dan asyncio.TimeoutError jika deadline lewat.
+    Jika hedge=True (dan DB_HEDGE_READS aktif), request kedua dikirim setelah jeda p95.
+    """
+    if not breaker.allow():
+        raise CircuitOpenError(f"Circuit open, skipping '{op_name}'")
+    timeout = timeout if timeout is not None else DB_TIMEOUT_SECONDS
+    started = time.monotonic()
+    try:
+        if hedge and DB_HEDGE_READS:
+            result = await _run_hedged(operation, timeout)
+        else:
+            result = await asyncio.wait_for(asyncio.to_thread(operation), timeout)
+    except asyncio.CancelledError:
+        breaker.release_probe()
+        raise
+    except Exception as e:
+        if is_server_fault(e):
+            breaker.record_failure(op_name)
+        elif hasattr(e, "message"):
+            breaker.record_success()  # backend menjawab (mis. 23505), jadi backend sehat
+        else:
+            breaker.release_probe()
+        raise
+    breaker.record_success()
+    if hedge:
+        read_latency.observe(time.monotonic() - started)
+    return result
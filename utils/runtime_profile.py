@@ -0,0 +1,89 @@
+import asyncio
+import logging
+from config import RUNTIME_PROFILE
+
+# "standard" = asyncio + json stdlib (bawaan aiogram). "fast" = uvloop + orjson bila terpasang;
+# yang tidak terpasang jatuh kembali ke versi standar masing-masing.
+PROFILES = ("standard", "fast")
+
+
+class RuntimeProfile:
+    def __init__(self, name: str, loop_factory=None, json_loads=None, json_dumps=None, missing=()):
+        self.name = name
+        self.loop_factory = loop_factory  # None = loop asyncio bawaan
+        self.json_loads = json_loads
+        self.json_dumps = json_dumps
+        self.missing = tuple(missing)
+
+    @property
+    def loop_name(self) -> str:
+        return "uvloop" if self.loop_factory else "asyncio"
+
+    @property
+    def json_name(self) -> str:
+        return "orjson" if self.json_loads else "json"
+
+    def session_kwargs(self) -> dict:
+        """Argumen untuk AiohttpSession / BaseSession: json_loads & json_dumps bila diganti."""
+        if not self.json_loads:
+            return {}
+        return {"json_loads": self.json_loads, "json_dumps": self.json_dumps}
+
+    def describe(self) -> str:
+        text = f"'{self.name}' (event loop: {self.loop_name}, json: {self.json_name})"
+        if self.missing:
+            text += f"; not installed, using stdlib fallback: {', '.join(self.missing)}"
+        return text
+
+    def run(self, main):
+        """Menjalankan coroutine `main` pada event loop profil ini (pengganti asyncio.run).
+
+        Loop asyncio dibuat eksplisit: aiogram memasang policy uvloop saat diimpor bila uvloop
+        terpasang, jadi asyncio.run biasa tidak menjamin loop stdlib.
+        """
+        if hasattr(asyncio, "Runner"):  # Python 3.11+
+            loop_factory = self.loop_factory or asyncio.DefaultEventLoopPolicy().new_event_loop
+            with asyncio.Runner(loop_factory=loop_factory) as runner:
+                return runner.run(main)
+        if self.loop_factory is None:
+            asyncio.set_event_loop_policy(asyncio.DefaultEventLoopPolicy())
+        else:
+            import uvloop
+            asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+        return asyncio.run(main)
+
+
+def _orjson_codec():
+    import orjson
+
+    def dumps(value) -> str:
+        # aiogram memakai hasil json_dumps sebagai str (field form / body), orjson menghasilkan bytes.
+        return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode()
+
+    return orjson.loads, dumps
+
+
+def resolve(name: str = RUNTIME_PROFILE) -> RuntimeProfile:
+    if name not in PROFILES:
+        logging.warning(f"Unknown RUNTIME_PROFILE '{name}', using 'standard'.")
+        name = "standard"
+    if name == "standard":
+        return RuntimeProfile(name)
+
+    missing = []
+    loop_factory = json_loads = json_dumps = None
+    try:
+        import uvloop
+        loop_factory = uvloop.new_event_loop
+    except ImportError:
+        missing.append("uvloop")
+    try:
+        json_loads, json_dumps = _orjson_codec()
+    except ImportError:
+        missing.append("orjson")
+    return RuntimeProfile(name, loop_factory, json_loads, json_dumps, missing)
+
+
+def active_loop_name() -> str:
+    """Nama modul event loop yang benar-benar berjalan (untuk log)."""
+    return type(asyncio.get_running_loop()).__module__.split(".")[0]
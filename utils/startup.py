@@ -0,0 +1,111 @@
+import asyncio
+import logging
+import time
+from aiogram import Bot
+from config import WARMUP_TIMEOUT_SECONDS, WARMUP_RETRY_SECONDS, TRIGGER_LOAD_TIMEOUT_SECONDS
+from . import database, admin_manager, trigger_manager, readiness
+
+
+async def _init_database() -> bool:
+    # Impor supabase + pembuatan klien itu sync dan berat, jadi dijalankan di thread.
+    if database.supabase is None:
+        await asyncio.to_thread(database.init_supabase_client)
+    return database.supabase is not None
+
+
+async def _warm_bot_profile(bot: Bot) -> bool:
+    await bot.me()  # di-cache oleh aiogram (bot._me), dipakai placeholder {bot_username}
+    return True
+
+
+async def _warm_locales() -> bool:
+    from handlers import common
+    return common.preload_locales()
+
+
+# Langkah dengan batas waktu sendiri (menggantikan WARMUP_TIMEOUT_SECONDS).
+STEP_TIMEOUTS = {"trigger_index": TRIGGER_LOAD_TIMEOUT_SECONDS}
+
+
+async def _run_step(name: str, factory, timeout: float, results: dict):
+    timeout = STEP_TIMEOUTS.get(name, timeout)
+    started = time.perf_counter()
+    try:
+        results[name] = bool(await asyncio.wait_for(factory(), timeout))
+    except asyncio.TimeoutError:
+        logging.error(f"Warm-up step '{name}' timed out after {timeout}s.")
+        results[name] = False
+    except Exception as e:
+        logging.error(f"Warm-up step '{name}' failed: {e}", exc_info=True)
+        results[name] = False
+    logging.info("Warm-up step '%s' %s in %.0f ms.", name, "ok" if results[name] else "FAILED",
+                 (time.perf_counter() - started) * 1000)
+
+
+# Langkah yang membutuhkan klien supabase; dijalankan setelah "supabase_client" berhasil.
+DB_STEPS = ("admin_cache", "trigger_index")
+
+
+def _warmup_steps(bot: Bot) -> dict:
+    return {
+        "supabase_client": _init_database,
+        "admin_cache": admin_manager.load_admins_to_cache,
+        "trigger_index": trigger_manager.load_trigger_index,
+        "bot_profile": lambda: _warm_bot_profile(bot),
+        "locales": _warm_locales,
+    }
+
+
+async def _warm_database_caches(steps: dict, results: dict, timeout: float, concurrent: bool):
+    if "supabase_client" in steps:
+        await _run_step("supabase_client", steps["supabase_client"], timeout, results)
+    db_steps = [(name, steps[name]) for name in DB_STEPS if name in steps]
+    if database.supabase is None:
+        for name, _ in db_steps:
+            results[name] = False
+        return
+    await _run_steps(db_steps, timeout, results, concurrent)
+
+
+async def _run_steps(steps: list, timeout: float, results: dict, concurrent: bool):
+    if concurrent:
+        await asyncio.gather(*(_run_step(name, factory, timeout, results) for name, factory in steps))
+    else:
+        for name, factory in steps:
+            await _run_step(name, factory, timeout, results)
+
+
+async def warm_up(bot: Bot, timeout: float = WARMUP_TIMEOUT_SECONDS, concurrent: bool = True, only=None) -> dict:
+    """Menghangatkan cache startup (klien DB, admin, indeks trigger, profil bot, locale).
+
+    Semua langkah berjalan bersamaan dengan timeout masing-masing; langkah yang butuh DB
+    menunggu klien supabase dibuat. `only` membatasi ke langkah tertentu (untuk retry).
+    Mengembalikan {nama_langkah: berhasil} untuk langkah yang dijalankan.
+    """
+    steps = _warmup_steps(bot)
+    if only is not None:
+        steps = {name: factory for name, factory in steps.items() if name in only}
+    results = {}
+    started = time.perf_counter()
+    jobs = []
+    if "supabase_client" in steps or any(name in steps for name in DB_STEPS):
+        jobs.append(_warm_database_caches(steps, results, timeout, concurrent))
+    jobs += [_run_step(name, factory, timeout, results) for name, factory in steps.items()
+             if name != "supabase_client" and name not in DB_STEPS]
+    if concurrent:
+        await asyncio.gather(*jobs)
+    else:
+        for job in jobs:
+            await job
+    logging.info("Warm-up finished in %.0f ms: %s", (time.perf_counter() - started) * 1000, results)
+    return results
+
+
+async def keep_warming(bot: Bot, results: dict, interval: float = WARMUP_RETRY_SECONDS):
+    """Mengulang hanya langkah warm-up yang gagal sampai semuanya berhasil, lalu menandai bot siap."""
+    while not all(results.values()):
+        await asyncio.sleep(interval)
+        failed = [name for name, ok in results.items() if not ok]
+        logging.info(f"Retrying failed warm-up steps: {failed}")
+        results.update(await warm_up(bot, only=failed))
+    readiness.mark_ready()
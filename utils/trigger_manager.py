@@ -1,22 +1,197 @@
+import asyncio
 import logging
-from . import database 
+import os
+import time
+from collections import deque
+from config import TRIGGER_SNAPSHOT_PATH, TRIGGER_SNAPSHOT_MAX_AGE_SECONDS, TRIGGER_REFRESH_SECONDS
+from . import database, inline_index
+from .trigger_store import TriggerStore, TriggerStoreBuilder
+
+try:
+    import fcntl
+except ImportError:  # bukan POSIX: tanpa lock antar-proses, tiap worker bisa membangun snapshot sendiri
+    fcntl = None
+
+# Semua trigger (lowercase) beserta responsnya di memori, dimuat saat startup. Selama masih
+# None (belum dimuat / gagal dimuat) semua pesan tetap dicek ke DB seperti biasa.
+# Perubahan dari luar proses ini baru terlihat setelah refresh berkala (TRIGGER_REFRESH_SECONDS).
+trigger_store = None
+# Waktu (time.time()) data trigger_store mulai diambil dari DB, oleh proses ini atau worker lain (snapshot).
+_store_generation = 0.0
+# Perubahan lokal (waktu, trigger_text, (response_type, response_content) atau None jika dihapus).
+# Diterapkan ulang ke store baru yang datanya diambil sebelum perubahan itu, supaya tidak hilang.
+_local_changes = deque()
+_load_lock = asyncio.Lock()
+SNAPSHOT_LOCK_POLL_SECONDS = 0.05
+
+def _set_store(store: TriggerStore, generation: float):
+    global trigger_store, _store_generation
+    for changed_at, trigger_text, response in _local_changes:
+        if changed_at < generation:
+            continue
+        if response is None:
+            store.remove(trigger_text)
+        else:
+            store.add(trigger_text, *response)
+    while _local_changes and _local_changes[0][0] < generation:
+        _local_changes.popleft()  # sudah ada di DB sebelum data store ini diambil
+    previous, trigger_store, _store_generation = trigger_store, store, generation
+    inline_index.index.attach(store)
+    if previous is not None:
+        previous.close()
+
+def _build_store(builder: TriggerStoreBuilder, generation: float) -> TriggerStore:
+    store = builder.build()
+    if not TRIGGER_SNAPSHOT_PATH:
+        return store
+    # Dibuka ulang lewat mmap: worker lain membuka file yang sama, jadi halamannya dibagi lewat page cache.
+    try:
+        store.save(TRIGGER_SNAPSHOT_PATH, mtime=generation)
+        return TriggerStore.open(TRIGGER_SNAPSHOT_PATH)
+    except OSError as e:
+        logging.error(f"Could not write trigger snapshot {TRIGGER_SNAPSHOT_PATH}: {e}. Keeping triggers on the heap.")
+        return store
+
+def _snapshot_generation():
+    """mtime snapshot (= waktu datanya diambil dari DB, lihat _build_store), atau None jika belum ada."""
+    try:
+        return os.stat(TRIGGER_SNAPSHOT_PATH).st_mtime
+    except FileNotFoundError:
+        return None
+
+async def _lock_snapshot():
+    """Lock eksklusif antar-proses (file .lock di samping snapshot) selama snapshot diperiksa / dibangun.
+
+    Ditunggu dengan polling, bukan flock blocking di thread, supaya pembatalan (timeout warm-up)
+    tidak meninggalkan lock yang terpegang. None jika lock tidak tersedia.
+    """
+    if fcntl is None:
+        return None
+    try:
+        lock_file = open(TRIGGER_SNAPSHOT_PATH + ".lock", "a")
+    except OSError as e:
+        logging.warning(f"Could not open trigger snapshot lock: {e}. Rebuilding without it.")
+        return None
+    try:
+        while True:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return lock_file
+            except BlockingIOError:
+                await asyncio.sleep(SNAPSHOT_LOCK_POLL_SECONDS)
+    except BaseException:
+        lock_file.close()
+        raise
+
+async def _reuse_snapshot() -> bool:
+    """Memakai snapshot yang dibangun worker lain jika belum lebih tua dari TRIGGER_SNAPSHOT_MAX_AGE_SECONDS."""
+    generation = await asyncio.to_thread(_snapshot_generation)
+    if generation is None or time.time() - generation > TRIGGER_SNAPSHOT_MAX_AGE_SECONDS:
+        return False
+    if generation <= _store_generation:
+        return True  # snapshot ini (atau yang lebih baru) sudah dimuat
+    try:
+        store = await asyncio.to_thread(TriggerStore.open, TRIGGER_SNAPSHOT_PATH)
+    except (OSError, ValueError) as e:
+        logging.warning(f"Could not open trigger snapshot {TRIGGER_SNAPSHOT_PATH}: {e}. Rebuilding it from the DB.")
+        return False
+    _set_store(store, generation)
+    logging.info("Trigger store loaded from shared snapshot (%.0fs old): %d triggers.", time.time() - generation, len(store))
+    return True
+
+def _record_change(trigger_text: str, response=None):
+    _local_changes.append((time.time(), trigger_text, response))
+
+async def _fetch_triggers():
+    """Mengambil learned_triggers per halaman (keyset pada id) langsung ke builder. None jika DB gagal."""
+    builder = TriggerStoreBuilder()
+    after_id = None
+    while True:
+        page = await database.get_trigger_responses_page_from_db(after_id, database.TRIGGER_PAGE_SIZE)
+        if page is None:
+            return None
+        builder.add_rows(page)
+        if len(page) < database.TRIGGER_PAGE_SIZE:
+            return builder
+        after_id = page[-1]['id']
+
+async def load_trigger_index() -> bool:
+    """Memuat trigger store (dan indeks inline) dari snapshot bersama yang masih segar, atau dari DB."""
+    async with _load_lock:
+        if not TRIGGER_SNAPSHOT_PATH:
+            return await _load_trigger_index()
+        # Hanya satu worker yang membangun ulang snapshot; yang lain menunggu lalu memakai file yang sama.
+        lock_file = await _lock_snapshot()
+        try:
+            return await _reuse_snapshot() or await _load_trigger_index()
+        finally:
+            if lock_file is not None:
+                lock_file.close()
+
+async def _load_trigger_index() -> bool:
+    generation = time.time()
+    builder = await _fetch_triggers()
+    if builder is None:
+        if trigger_store is None and TRIGGER_SNAPSHOT_PATH and os.path.exists(TRIGGER_SNAPSHOT_PATH):
+            generation = await asyncio.to_thread(_snapshot_generation) or 0.0
+            _set_store(await asyncio.to_thread(TriggerStore.open, TRIGGER_SNAPSHOT_PATH), generation)
+            logging.warning("DB unavailable; serving %d triggers from snapshot %s until it can be reloaded.",
+                            len(trigger_store), TRIGGER_SNAPSHOT_PATH)
+        return False
+    _set_store(await asyncio.to_thread(_build_store, builder, generation), generation)
+    logging.info("Trigger store loaded: %d triggers (%s).", len(trigger_store), trigger_store.memory_usage())
+    return True
 
 async def add_trigger(trigger_text: str, response_type: str, response_content: str, creator_id: int):
     logging.info(f"TriggerManager: Attempting to add trigger to DB: {trigger_text} by creator_id {creator_id}")
     result = await database.add_trigger_to_db(trigger_text, response_type, response_content, creator_id)
     if result == "exists":
         return "exists"
+    if result is not None and trigger_store is not None:
+        trigger_store.add(trigger_text.lower(), response_type, response_content)
+        inline_index.index.invalidate(trigger_text.lower())
+    if result is not None:
+        _record_change(trigger_text.lower(), (response_type, response_content))
     return result is not None
 
 async def get_response_for_trigger(text: str):
+    # Trigger store berisi seluruh learned_triggers, jadi jawabannya tidak perlu round trip ke DB.
+    if trigger_store is not None:
+        record = trigger_store.get(text.lower())
+        return record.as_response() if record is not None else None
     return await database.get_response_from_db(text)
 
+def search_inline(query: str, offset: int, limit: int):
+    """Pencarian prefix untuk inline mode; murni dari memori, tidak pernah ke DB."""
+    return inline_index.index.search(query.lower(), offset, limit)
+
 async def trigger_exists(trigger_text: str):
     return await database.check_trigger_exists_in_db(trigger_text)
 
-async def get_all_triggers_for_admins(): 
-    return await database.get_all_triggers_from_db()
+async def get_triggers_page_for_admins(offset: int, limit: int):
+    """Satu halaman daftar trigger untuk /deletetrigger: (rows, total), atau None jika DB gagal."""
+    return await database.get_triggers_page_from_db(offset, limit)
 
 async def delete_trigger(trigger_text: str): 
     logging.info(f"TriggerManager: Attempting to delete trigger from DB: {trigger_text}")
-    return await database.delete_trigger_from_db(trigger_text)
+    deleted = await database.delete_trigger_from_db(trigger_text)
+    if deleted and trigger_store is not None:
+        trigger_store.remove(trigger_text.lower())
+        inline_index.index.invalidate(trigger_text.lower())
+    if deleted:
+        _record_change(trigger_text.lower())
+    return deleted
+
+async def _refresh_periodically(interval: float):
+    while True:
+        await asyncio.sleep(interval)
+        if trigger_store is None:
+            continue  # belum pernah dimuat; itu urusan retry warm-up (utils/startup.py)
+        if not await load_trigger_index():
+            logging.warning("Periodic trigger refresh failed; keeping the current trigger store.")
+
+def start_refresher(interval: float = TRIGGER_REFRESH_SECONDS):
+    """Memuat ulang trigger store berkala supaya perubahan dari worker lain / dashboard ikut terlihat."""
+    if interval <= 0:
+        return None
+    return asyncio.create_task(_refresh_periodically(interval))
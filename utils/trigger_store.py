@@ -0,0 +1,321 @@
+import heapq
+import logging
+import mmap
+import os
+import struct
+import tempfile
+from array import array
+from bisect import bisect_left
+from enum import IntEnum
+from itertools import islice
+
+
+class ResponseType(IntEnum):
+    TEXT = 0
+    PHOTO = 1
+    ANIMATION = 2
+    STICKER = 3
+
+    @property
+    def label(self) -> str:
+        """Nama seperti yang disimpan di kolom response_type ('text', 'photo', ...)."""
+        return self.name.lower()
+
+    @classmethod
+    def parse(cls, value):
+        try:
+            return cls[value.upper()]
+        except (KeyError, AttributeError):
+            return None
+
+
+class TriggerRecord:
+    __slots__ = ("trigger_text", "response_type", "response_content")
+
+    def __init__(self, trigger_text: str, response_type: ResponseType, response_content: str):
+        self.trigger_text = trigger_text
+        self.response_type = response_type
+        self.response_content = response_content
+
+    def as_response(self) -> dict:
+        """Bentuk yang sama dengan hasil database.get_response_from_db()."""
+        return {"response_type": self.response_type.label, "response_content": self.response_content}
+
+
+# Format snapshot (native byte order, untuk dipakai di host yang sama):
+#   header | text_offsets Q[n+1] | content_offsets Q[n] | content_lengths I[n] | types B[n] | buffer
+# Teks trigger tersimpan terurut (byte UTF-8) dan berurutan di awal buffer; respons (teks/file_id)
+# di belakangnya, dan file_id media yang sama persis hanya disimpan sekali.
+SNAPSHOT_MAGIC = b"TRGSNAP1"
+_HEADER = struct.Struct("=8sQQ")  # magic, jumlah trigger, ukuran buffer
+
+
+def _record_key(record) -> bytes:
+    return record.trigger_text.encode("utf-8")
+
+
+def _pad(size: int) -> int:
+    return (size + 7) & ~7
+
+
+class _SortedTexts:
+    """Tampilan urutan teks trigger (bytes) untuk bisect, tanpa membuat list semua kunci."""
+
+    def __init__(self, store):
+        self._offsets = store._text_offsets
+        self._buffer = store._buffer
+        self._start = store._buffer_start
+        self._count = store._count
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, i):
+        offsets = self._offsets
+        return self._buffer[self._start + offsets[i]:self._start + offsets[i + 1]]
+
+
+class TriggerStore:
+    """Semua trigger di memori dalam beberapa array + satu buffer bytes, bukan jutaan dict.
+
+    Bagian dasar (hasil build/snapshot) tidak berubah; trigger yang ditambah/dihapus setelahnya
+    disimpan di overlay kecil (_added/_hidden) sampai store dibangun ulang.
+    """
+
+    def __init__(self, count, text_offsets, content_offsets, content_lengths, types, buffer, buffer_start=0, mapped=None):
+        self._count = count
+        self._text_offsets = text_offsets
+        self._content_offsets = content_offsets
+        self._content_lengths = content_lengths
+        self._types = types
+        self._buffer = buffer  # bytes atau mmap; slicing keduanya menghasilkan bytes
+        self._buffer_start = buffer_start
+        self._mapped = mapped  # objek mmap bila dibuka dari snapshot
+        self._sorted_texts = _SortedTexts(self)
+        self._added = {}     # trigger_text -> TriggerRecord
+        self._hidden = set()  # trigger_text di bagian dasar yang dihapus / ditimpa overlay
+
+    # --- pembuatan ---
+    @classmethod
+    def build(cls, rows) -> "TriggerStore":
+        """Membangun store dari baris learned_triggers (trigger_text, response_type, response_content)."""
+        return TriggerStoreBuilder().add_rows(rows).build()
+
+    def save(self, path: str, mtime: float = None):
+        """Menulis snapshot secara atomik: file sementara unik per proses, fsync, lalu os.replace.
+
+        Beberapa worker boleh menulis snapshot yang sama bersamaan; masing-masing menulis file
+        sementaranya sendiri, dan pembaca selalu melihat salah satu snapshot utuh.
+        `mtime` (jika diisi) dipasang sebelum file dipublikasikan, mis. waktu data diambil dari DB.
+        """
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(_HEADER.pack(SNAPSHOT_MAGIC, self._count, len(self._buffer) - self._buffer_start))
+                for section in (self._text_offsets, self._content_offsets, self._content_lengths, self._types):
+                    data = memoryview(section).cast("B")
+                    f.write(data)
+                    f.write(b"\0" * (_pad(len(data)) - len(data)))
+                f.write(memoryview(self._buffer)[self._buffer_start:])
+                f.flush()
+                os.fsync(f.fileno())
+            if mtime is not None:
+                os.utime(tmp_path, (mtime, mtime))
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    @classmethod
+    def open(cls, path: str, use_mmap: bool = True) -> "TriggerStore":
+        """Membuka snapshot. Dengan mmap, halaman file dibagi (page cache) oleh semua proses yang membukanya."""
+        with open(path, "rb") as f:
+            if use_mmap:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                data = f.read()
+        magic, count, buffer_size = _HEADER.unpack_from(data, 0)
+        if magic != SNAPSHOT_MAGIC:
+            raise ValueError(f"{path} is not a trigger store snapshot")
+
+        view = memoryview(data)
+        position = _HEADER.size
+        sections = []
+        for typecode, length in (("Q", count + 1), ("Q", count), ("I", count), ("B", count)):
+            size = length * array(typecode).itemsize
+            sections.append(view[position:position + size].cast(typecode))
+            position += _pad(size)
+        if position + buffer_size != len(data):
+            raise ValueError(f"{path} is truncated or corrupt")
+        return cls(count, *sections, buffer=data, buffer_start=position, mapped=data if use_mmap else None)
+
+    # --- akses ---
+    def _text_at(self, i: int) -> bytes:
+        start = self._buffer_start
+        return self._buffer[start + self._text_offsets[i]:start + self._text_offsets[i + 1]]
+
+    def _record_at(self, i: int) -> TriggerRecord:
+        start = self._buffer_start + self._content_offsets[i]
+        content = self._buffer[start:start + self._content_lengths[i]].decode("utf-8")
+        return TriggerRecord(self._text_at(i).decode("utf-8"), ResponseType(self._types[i]), content)
+
+    def _find(self, key: bytes) -> int:
+        i = self._bisect(key)
+        if i < self._count and self._text_at(i) == key:
+            return i
+        return -1
+
+    def _bisect(self, key: bytes) -> int:
+        return bisect_left(self._sorted_texts, key)
+
+    def get(self, trigger_text: str):
+        record = self._added.get(trigger_text)
+        if record is not None:
+            return record
+        if trigger_text in self._hidden:
+            return None
+        i = self._find(trigger_text.encode("utf-8"))
+        return self._record_at(i) if i >= 0 else None
+
+    def __contains__(self, trigger_text: str) -> bool:
+        if trigger_text in self._added:
+            return True
+        if trigger_text in self._hidden:
+            return False
+        return self._find(trigger_text.encode("utf-8")) >= 0
+
+    def __len__(self):
+        return self._count - len(self._hidden) + len(self._added)
+
+    def __iter__(self):
+        """Semua trigger terurut, dibaca satu per satu (tanpa membuat list)."""
+        return heapq.merge(self._iter_base_prefix(b""), sorted(self._added.values(), key=_record_key), key=_record_key)
+
+    def _iter_base_prefix(self, prefix: bytes):
+        i = self._bisect(prefix)
+        while i < self._count:
+            text = self._text_at(i)
+            if not text.startswith(prefix):
+                return
+            record = self._record_at(i)
+            if record.trigger_text not in self._hidden:
+                yield record
+            i += 1
+
+    def prefix(self, prefix: str, offset: int = 0, limit: int = None):
+        """Trigger dengan awalan `prefix`, terurut, dimulai dari urutan ke-`offset`."""
+        added = sorted((record for text, record in self._added.items() if text.startswith(prefix)), key=_record_key)
+        merged = heapq.merge(self._iter_base_prefix(prefix.encode("utf-8")), added, key=_record_key)
+        stop = None if limit is None else offset + limit
+        return list(islice(merged, offset, stop))
+
+    # --- perubahan setelah build ---
+    def add(self, trigger_text: str, response_type: str, response_content: str) -> bool:
+        parsed = ResponseType.parse(response_type)
+        if parsed is None or not response_content:
+            return False
+        if self._find(trigger_text.encode("utf-8")) >= 0:
+            self._hidden.add(trigger_text)
+        self._added[trigger_text] = TriggerRecord(trigger_text, parsed, response_content)
+        return True
+
+    def remove(self, trigger_text: str):
+        self._added.pop(trigger_text, None)
+        if self._find(trigger_text.encode("utf-8")) >= 0:
+            self._hidden.add(trigger_text)
+
+    def memory_usage(self) -> dict:
+        """Ukuran bagian dasar dalam bytes (yang di-mmap tidak dihitung sebagai heap)."""
+        arrays = sum(memoryview(section).nbytes for section in
+                     (self._text_offsets, self._content_offsets, self._content_lengths, self._types))
+        return {"arrays": arrays, "buffer": len(self._buffer) - self._buffer_start, "mapped": self._mapped is not None}
+
+    def close(self):
+        if self._mapped is not None:
+            for section in (self._text_offsets, self._content_offsets, self._content_lengths, self._types):
+                section.release()
+            self._mapped.close()
+            self._mapped = None
+
+
+class TriggerStoreBuilder:
+    """Membangun TriggerStore sedikit demi sedikit (mis. per halaman DB) tanpa menyimpan baris dict.
+
+    Teks dan respons langsung di-encode ke buffer saat add_rows(); pengurutan baru di build().
+    """
+
+    def __init__(self):
+        self._texts = bytearray()
+        self._text_offsets = array("Q", [0])
+        self._contents = bytearray()
+        self._content_offsets = array("Q")
+        self._content_lengths = array("I")
+        self._types = array("B")
+        # hash(file_id) -> offset. Hanya media: file_id sering dipakai ulang, respons teks jarang.
+        self._interned = {}
+        self.skipped = 0
+
+    def __len__(self):
+        return len(self._types)
+
+    def _content_offset(self, response_type: ResponseType, encoded: bytes) -> int:
+        if response_type != ResponseType.TEXT:
+            key = hash(encoded)
+            offset = self._interned.get(key)
+            if offset is not None and self._contents[offset:offset + len(encoded)] == encoded:
+                return offset
+            self._interned[key] = len(self._contents)
+        offset = len(self._contents)
+        self._contents += encoded
+        return offset
+
+    def add_rows(self, rows) -> "TriggerStoreBuilder":
+        for row in rows:
+            response_type = ResponseType.parse(row.get('response_type'))
+            content = row.get('response_content')
+            if response_type is None or not content:
+                self.skipped += 1
+                continue
+            self._texts += row['trigger_text'].encode("utf-8")
+            self._text_offsets.append(len(self._texts))
+            encoded = content.encode("utf-8")
+            self._content_offsets.append(self._content_offset(response_type, encoded))
+            self._content_lengths.append(len(encoded))
+            self._types.append(response_type)
+        return self
+
+    def build(self) -> TriggerStore:
+        if self.skipped:
+            logging.warning("Trigger store skipped %d rows with incomplete responses.", self.skipped)
+        self._interned = {}
+        texts, offsets = memoryview(self._texts), self._text_offsets
+        count = len(self._types)
+
+        def text_at(i: int) -> bytes:
+            return texts[offsets[i]:offsets[i + 1]].tobytes()
+
+        # sorted() stabil: untuk teks yang muncul lebih dari sekali, yang terakhir ditambahkan menang.
+        order = sorted(range(count), key=text_at)
+        buffer = bytearray()
+        text_offsets = array("Q", [0])
+        kept = array("Q")
+        for position, i in enumerate(order):
+            text = text_at(i)
+            if position + 1 < count and text_at(order[position + 1]) == text:
+                continue
+            buffer += text
+            text_offsets.append(len(buffer))
+            kept.append(i)
+        del order
+
+        base = len(buffer)
+        content_offsets = array("Q", (base + self._content_offsets[i] for i in kept))
+        content_lengths = array("I", (self._content_lengths[i] for i in kept))
+        types = array("B", (self._types[i] for i in kept))
+        texts.release()
+        buffer += self._contents
+        return TriggerStore(len(kept), text_offsets, content_offsets, content_lengths, types, bytes(buffer))